@@ -0,0 +1,69 @@
+"""
+Inner-loop: Finds paths with value vectors in the target region
+Best-first (A*-style) search, guided by the lower bounds obtained from the
+Single-objective value iteration (i.e., single_vi_iter.py).
+Unlike the depth-first search in dfs_lower.py, all partial paths share one priority queue,
+ordered by the Manhattan distance between their lower bound (cost so far + lower bound of the node) and the target,
+so the search does not dive into a long subtree before it has found a path in the target region.
+"""
+
+import heapq
+
+import numpy as np
+
+from inner_search import InnerSearch
+
+
+def best_first_lower(G, S, T, t, U, max_iter=None, objectives=('length', 'crossing'), cache=None, anytime=False,
+                     time_budget=None, on_improve=None):
+    """
+    Given a target t, the method finds a path from S to T in the target region, guided by the lower bounds.
+    :param G: Multi-objective search graph G = (V, E), either a networkx graph or a CompactGraph
+    :param S: Starting node
+    :param T: Terminating (ending) node
+    :param t: Target
+    :param U: Upper bounds, computed in the outer_loop.py
+    :param max_iter: Maximum iterations. By default (i.e., max_iter=None), the algorithm runs until it has found a path
+    (or until convergence if anytime=True). For experimenting with stopping criteria, set the max_iter to a number
+    :param objectives: Objectives, in the same order as the entries of t and U
+    :param cache: LowerBoundCache (i.e., lower_bound_cache.py) to reuse the lower bounds of earlier calls with the same G and T.
+    Or Landmarks (i.e., landmarks.py) for lower bounds towards any T without computing them per query.
+    By default (i.e., cache=None), the lower bounds are computed from scratch
+    :param anytime: By default (i.e., anytime=False), the first path that lands in the target region is returned.
+    With anytime=True, the search continues with the tightened upper bounds until no better path can be found
+    :param time_budget: Wall-clock budget in milliseconds. By default (i.e., time_budget=None), there is no time limit.
+    When the budget runs out, the best path found so far is returned
+    :param on_improve: Callback on_improve(path, cost), called every time a better path is found (i.e., U improves)
+    :return Best path found; Updated upper bounds, i.e., the cost of that path if one was found;
+    Whether the search ran to completion, i.e., the path is proven optimal for the target region
+    """
+    search = InnerSearch(G, S, T, t, U, objectives, cache, max_iter, time_budget, on_improve)
+    labels = search.labels
+    queue = [(np.sum(np.abs(t - search.lower[labels.node[search.first]])), search.first)]  # (distance to the target, label)
+
+    while queue:
+        _, label = heapq.heappop(queue)
+        current_node, current_cost = labels.node[label], labels.cost[label]  # current_cost is the total cost up to the current_node
+
+        # U may have been tightened since the label was queued
+        if np.any(np.greater(current_cost + search.lower[current_node], search.U)):
+            continue
+
+        if current_node == search.t_index:
+            if search.reach(label) and not anytime:
+                break
+            continue
+
+        if not search.settle(label):
+            continue
+
+        new_labels, distance = search.expand(label)
+        for neighbor_distance, new_label in zip(distance.tolist(), new_labels.tolist()):
+            heapq.heappush(queue, (neighbor_distance, new_label))  # The label breaks ties in insertion order
+
+        if search.out_of_budget():
+            break
+
+    optimal = not queue  # Nothing left to search in the target region, so no better path exists
+
+    return search.result('Best-first', optimal)
@@ -0,0 +1,125 @@
+"""
+Chain contraction: Simplifies the sidewalk graph by merging chains of degree-2 nodes into single edges.
+momepy.gdf_to_nx splits a sidewalk into many segments, so most nodes only connect two other nodes.
+Such a node is never a decision point for routing, and replacing the chain it lies on by one edge
+with the summed costs leaves every S-T path cost unchanged while the graph shrinks considerably.
+An expansion table keeps the removed nodes of each merged edge, to turn paths on the simplified graph
+back into the original node sequence (e.g., for plotting).
+
+Only undirected graphs are supported.
+"""
+
+import numpy as np
+
+import compact_graph
+
+
+def contract_chains(G, objectives, keep=()):
+    """
+    Merges every chain of degree-2 nodes into a single edge between the nodes at its ends
+    :param G: Multi-objective search graph G = (V, E), either a networkx graph or a CompactGraph
+    :param objectives: Objectives
+    :param keep: Nodes that must stay in the graph (e.g., S and T)
+    :return: Simplified CompactGraph with the original node labels;
+    Expansion table {(u, w): [nodes removed between u and w, in order from u to w]}
+    """
+    graph = compact_graph.as_compact(G, objectives)
+    if graph.directed:
+        raise ValueError("Chain contraction is only supported for undirected graphs")
+
+    indptr, indices = graph.indptr.tolist(), graph.indices.tolist()
+    costs = graph.objective_costs(objectives)
+    keep = {graph.index(n) for n in keep}
+
+    # A node is removed if it has exactly two edges, to two different nodes other than itself
+    contractible = [False] * len(graph)
+    for v in range(len(graph)):
+        heads = indices[indptr[v]:indptr[v + 1]]
+        contractible[v] = len(heads) == 2 and heads[0] != heads[1] and v not in heads and v not in keep
+    kept = [v for v in range(len(graph)) if not contractible[v]]
+
+    edges = []  # (u, w, cost, removed nodes from u to w)
+    pairs = set()  # Endpoints that are joined by an edge already
+
+    # Edges between two kept nodes stay as they are (including parallel edges)
+    for u in kept:
+        for e in range(indptr[u], indptr[u + 1]):
+            w = indices[e]
+            if u < w and not contractible[w]:
+                edges.append((u, w, costs[e], []))
+                pairs.add((u, w))
+
+    # Follow each chain from the kept node at either end; it is added from the end with the lower id
+    for u in kept:
+        for e in range(indptr[u], indptr[u + 1]):
+            previous, current = u, indices[e]
+            if not contractible[current]:
+                continue
+
+            removed = []
+            cost, before_last = costs[e], np.zeros(len(objectives))  # Cost of the chain so far, and without its last edge
+            while contractible[current]:
+                removed.append(current)
+                a, b = indptr[current], indptr[current] + 1
+                arc = a if indices[a] != previous else b
+                cost, before_last = cost + costs[arc], cost
+                previous, current = current, indices[arc]
+            w = current
+
+            if w < u:
+                continue  # Added when the chain is followed from the other end
+            if w == u:
+                continue  # A loop is never part of a Pareto-optimal path
+
+            if (u, w) in pairs:
+                # Another edge joins u and w already: keep the last removed node, so that the pair identifies the edge
+                last = removed.pop()
+                contractible[last] = False
+                edges.append((u, last, before_last, removed))
+                edges.append((min(last, w), max(last, w), costs[arc], []))
+                pairs.update(((u, last), (min(last, w), max(last, w))))
+            else:
+                edges.append((u, w, cost, removed))
+                pairs.add((u, w))
+
+    # Chains that are cycles without a kept node are dropped along with their nodes
+    kept = [v for v in range(len(graph)) if not contractible[v]]
+    new_id = {v: i for i, v in enumerate(kept)}
+
+    arcs = [[] for _ in kept]
+    for u, w, cost, _ in edges:
+        arcs[new_id[u]].append((new_id[w], cost))
+        arcs[new_id[w]].append((new_id[u], cost))
+
+    indptr = np.concatenate(([0], np.cumsum([len(a) for a in arcs]))).astype(np.int64)
+    new_indices = np.array([w for a in arcs for w, _ in a], dtype=np.int64)
+    new_costs = np.array([cost for a in arcs for _, cost in a], dtype=np.float64).reshape((-1, len(objectives)))
+
+    nodes = graph.nodes
+    simplified = compact_graph.CompactGraph([nodes[v] for v in kept], indptr, new_indices, new_costs, objectives)
+
+    expansion = {}
+    for u, w, _, removed in edges:
+        if removed:
+            expansion[(nodes[u], nodes[w])] = [nodes[v] for v in removed]
+            expansion[(nodes[w], nodes[u])] = [nodes[v] for v in reversed(removed)]
+
+    return simplified, expansion
+
+
+def expand_path(path, expansion):
+    """
+    Turns a path on the simplified graph back into the node sequence on the original graph
+    :param path: Sequence of node labels
+    :param expansion: Expansion table from contract_chains
+    :return: List of node labels
+    """
+    if not path:
+        return []
+
+    expanded = [path[0]]
+    for u, w in zip(path[:-1], path[1:]):
+        expanded.extend(expansion.get((u, w), ()))
+        expanded.append(w)
+
+    return expanded
@@ -0,0 +1,301 @@
+"""
+Compact graph: An array-based representation of the multi-objective search graph for the routing core.
+Nodes get integer ids, the adjacency is stored in compressed sparse row (CSR) format (indptr, indices),
+and the edge costs in a float64 matrix with one column per objective.
+Built once from the networkx graph (e.g., the output of momepy.gdf_to_nx).
+
+A graph can also be written to a directory of .npy files and opened memory-mapped (read-only),
+so that many worker processes share one copy of the arrays through the OS page cache.
+"""
+
+import contextlib
+import json
+import os
+import uuid
+
+import networkx as nx
+import numpy as np
+
+
+@contextlib.contextmanager
+def _replacing(path, mode='wb'):
+    """
+    Opens a temporary file in the directory of path, which replaces path once it is written without an error,
+    so that a process that reads path at the same time (e.g., load_graph in another worker) never sees half a file
+    :param path: Path of the file
+    :param mode: Mode to open the temporary file with
+    """
+    temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(temporary, mode) as f:
+            yield f
+        os.replace(temporary, path)  # Atomic within a file system
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+class CompactGraph:
+    """
+    Multi-objective graph in CSR format. The arcs leaving node i are indices[indptr[i]:indptr[i+1]],
+    with their cost vectors in the same rows of costs. An undirected edge is stored as two arcs.
+    """
+
+    def __init__(self, nodes, indptr, indices, costs, objectives, directed=False):
+        """
+        :param nodes: Node labels (e.g., coordinate tuples), position i holds the label of node id i.
+        Can also be an array of shape (number of nodes, number of coordinates), whose rows become the labels
+        only when they are first needed
+        :param indptr: Array of length (number of nodes + 1) with the offsets of each node's arcs
+        :param indices: Array with the head node id of each arc
+        :param costs: Array of shape (number of arcs, number of objectives) with the cost vector of each arc
+        :param objectives: Objectives, one for each column of costs
+        :param directed: Whether the arcs only go one way
+        """
+        self._nodes = nodes if isinstance(nodes, np.ndarray) else list(nodes)
+        self._node_index = None
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.costs = np.asarray(costs, dtype=np.float64).reshape((len(self.indices), len(objectives)))
+        self.objectives = tuple(objectives)
+        self.directed = directed
+
+    @classmethod
+    def from_networkx(cls, G, objectives):
+        """
+        Builds the compact graph from a networkx (multi)graph.
+        Parallel edges whose cost vectors are equal to or dominated by another parallel edge are dropped.
+        :param G: Multi-objective search graph G = (V, E)
+        :param objectives: Objectives to store a cost column for
+        :return: CompactGraph with the nodes in the order of G.nodes
+        """
+        nodes = list(G.nodes)
+        node_index = {n: i for i, n in enumerate(nodes)}
+
+        indptr = [0]
+        indices = []
+        costs = []
+
+        for n1 in nodes:
+            for n2, edge in G.adj[n1].items():
+                edge_data = edge.values() if G.is_multigraph() else [edge]
+                candidates = [tuple(data[i] for i in objectives) for data in edge_data]
+
+                for cost in _non_dominated(candidates):
+                    indices.append(node_index[n2])
+                    costs.append(cost)
+
+            indptr.append(len(indices))
+
+        return cls(nodes, indptr, indices, np.array(costs, dtype=np.float64).reshape((-1, len(objectives))),
+                   objectives, directed=G.is_directed())
+
+    @classmethod
+    def load(cls, path):
+        """
+        Opens a graph written by save()
+        :param path: Path of the .npz file
+        :return: CompactGraph
+        """
+        with np.load(path) as data:
+            return cls(data['nodes'], data['indptr'], data['indices'], data['costs'],
+                       tuple(data['objectives'].tolist()), directed=bool(data['directed']))
+
+    @classmethod
+    def open_mmap(cls, directory):
+        """
+        Opens a graph written by write_mmap() without reading it into memory
+        :param directory: Directory of the graph store
+        :return: CompactGraph whose arrays are read-only memory maps
+        """
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+                  for name in ('nodes', 'indptr', 'indices', 'costs')}
+
+        return cls(arrays['nodes'], arrays['indptr'], arrays['indices'], arrays['costs'],
+                   tuple(meta['objectives']), directed=meta['directed'])
+
+    def write_mmap(self, directory):
+        """
+        Writes the graph as one .npy file per array, to be opened with open_mmap().
+        The node labels have to be coordinate tuples
+        :param directory: Directory of the graph store
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        arrays = {'nodes': np.asarray(self._nodes, dtype=np.float64), 'indptr': self.indptr,
+                  'indices': self.indices, 'costs': self.costs}
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array))
+
+        # Written last, so a store without meta.json is known to be incomplete
+        with _replacing(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump({'objectives': list(self.objectives), 'directed': self.directed}, f)
+
+    def save(self, path):
+        """
+        Writes the graph to an uncompressed .npz file. The node labels have to be coordinate tuples
+        :param path: Path of the .npz file, to which .npz is appended if it doesn't end with it (as np.savez does)
+        """
+        path = os.fspath(path)
+        if not path.endswith('.npz'):
+            path += '.npz'
+
+        with _replacing(path) as f:
+            np.savez(f, nodes=np.asarray(self._nodes, dtype=np.float64), indptr=self.indptr, indices=self.indices,
+                     costs=self.costs, objectives=np.array(self.objectives), directed=np.array(self.directed))
+
+    def to_networkx(self):
+        """
+        Builds a networkx multigraph with one edge per arc (one per pair of arcs if undirected), e.g., for plotting
+        :return: Multi-objective search graph G = (V, E)
+        """
+        G = nx.MultiDiGraph() if self.directed else nx.MultiGraph()
+        G.add_nodes_from(self.nodes)
+
+        for n1 in range(len(self.nodes)):
+            for e in self.arcs(n1):
+                n2 = self.indices[e]
+                if not self.directed and n2 < n1:  # The other arc of an undirected edge
+                    continue
+                G.add_edge(self.nodes[n1], self.nodes[n2], **dict(zip(self.objectives, self.costs[e].tolist())))
+
+        return G
+
+    def __len__(self):
+        return len(self._nodes)
+
+    @property
+    def nodes(self):
+        """
+        :return: List of node labels, position i holds the label of node id i
+        """
+        if isinstance(self._nodes, np.ndarray):
+            self._nodes = [tuple(n) for n in self._nodes.tolist()]
+        return self._nodes
+
+    @property
+    def coordinates(self):
+        """
+        :return: Array of shape (number of nodes, number of coordinates), the node labels have to be coordinate tuples
+        """
+        return np.asarray(self._nodes, dtype=np.float64)
+
+    @property
+    def node_index(self):
+        """
+        :return: Dictionary from node label to node id
+        """
+        if self._node_index is None:
+            self._node_index = {n: i for i, n in enumerate(self.nodes)}
+        return self._node_index
+
+    @property
+    def num_arcs(self):
+        return len(self.indices)
+
+    def index(self, node):
+        """
+        :param node: Node label
+        :return: Node id
+        """
+        return self.node_index[node]
+
+    def objective_columns(self, objectives):
+        """
+        :param objectives: Objectives
+        :return: Column of costs for each objective
+        """
+        return [self.objectives.index(i) for i in objectives]
+
+    def objective_costs(self, objectives):
+        """
+        Cost matrix restricted to the given objectives. No copy is made if they are all objectives of the graph in order
+        :param objectives: Objectives
+        :return: Array of shape (number of arcs, number of objectives)
+        """
+        columns = self.objective_columns(objectives)
+        if columns == list(range(len(self.objectives))):
+            return self.costs
+        return self.costs[:, columns]
+
+    def arcs(self, i):
+        """
+        :param i: Node id
+        :return: Range of the arcs leaving node i
+        """
+        return range(self.indptr[i], self.indptr[i + 1])
+
+    def reverse(self):
+        """
+        Graph with every arc turned around, used to search backwards from T.
+        An undirected graph is its own reverse.
+        :return: Reversed CompactGraph
+        """
+        if not self.directed:
+            return self
+
+        tails = np.repeat(np.arange(len(self)), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind='stable')
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(self.indices, minlength=len(self)))))
+
+        return CompactGraph(self._nodes, indptr, tails[order], self.costs[order], self.objectives, directed=True)
+
+    def path_to_nodes(self, path):
+        """
+        :param path: Sequence of node ids
+        :return: Sequence of node labels
+        """
+        return [self.nodes[i] for i in path]
+
+    def path_cost(self, path, objectives=None):
+        """
+        Total cost of a path given as node labels, taking the cheapest arc between consecutive nodes
+        :param path: Sequence of node labels
+        :param objectives: Objectives; by default (i.e., objectives=None) all objectives of the graph
+        :return: Cost vector of the path
+        """
+        columns = self.objective_columns(objectives if objectives is not None else self.objectives)
+        total = np.zeros(len(columns))
+
+        for n1, n2 in zip(path[:-1], path[1:]):
+            i, j = self.node_index[n1], self.node_index[n2]
+            arcs = np.arange(self.indptr[i], self.indptr[i + 1])
+            arcs = arcs[self.indices[arcs] == j]
+            total += self.costs[arcs][:, columns].min(axis=0)
+
+        return total
+
+
+def as_compact(G, objectives):
+    """
+    :param G: Multi-objective search graph, either a networkx graph or a CompactGraph
+    :param objectives: Objectives the graph needs costs for
+    :return: CompactGraph of G
+    """
+    if isinstance(G, CompactGraph):
+        return G
+
+    return CompactGraph.from_networkx(G, objectives)
+
+
+def _non_dominated(candidates):
+    """
+    Removes duplicate and dominated cost vectors among the parallel edges between two nodes
+    :param candidates: List of cost vectors (tuples)
+    :return: List of the remaining cost vectors, in their original order
+    """
+    if len(candidates) == 1:
+        return candidates
+
+    kept = []
+    for cost in candidates:
+        if any(all(a <= b for a, b in zip(other, cost)) for other in kept):
+            continue
+        kept = [other for other in kept if not all(a <= b for a, b in zip(cost, other))]
+        kept.append(cost)
+
+    return kept
@@ -0,0 +1,300 @@
+"""
+Contraction hierarchy: Preprocessing for fast single-objective shortest-path queries between two nodes.
+The nodes are contracted one by one, least important first; when a node is removed, a shortcut is added
+between each pair of its neighbours whose shortest path went through it. A query is then a bidirectional
+Dijkstra search that only moves up the hierarchy, which settles a few hundred nodes even on a large map,
+and the shortcuts of the resulting path are unpacked into the original edges.
+
+Each hierarchy is built for one objective. Ties are broken by the remaining objectives, in order,
+so the path found is the lexicographically best one (e.g., the shortest among the paths with the fewest crossings).
+Only undirected graphs are supported.
+
+Geisberger, R., Sanders, P., Schultes, D., & Delling, D. (2008). Contraction hierarchies: Faster and simpler
+hierarchical routing in road networks. Proceedings of the 7th Workshop on Experimental Algorithms, 319-333.
+"""
+
+import heapq
+import os
+
+import networkx as nx
+import numpy as np
+
+import compact_graph
+import lower_bound_cache
+
+
+class ContractionHierarchy:
+    """
+    Upward graph of a contraction hierarchy: for every node, the (shortcut) edges to the nodes contracted after it,
+    each with its cost vector and the node it bypasses (-1 for an original edge)
+    """
+
+    def __init__(self, G, objectives, objective=None, witness_limit=64):
+        """
+        Contracts the nodes of G in the order of their edge difference (shortcuts added minus edges removed)
+        :param G: Multi-objective search graph G = (V, E), either a networkx graph or a CompactGraph
+        :param objectives: Objectives; the cost of a path is reported for all of them
+        :param objective: Objective to minimize. By default (i.e., objective=None), the first of objectives
+        :param witness_limit: Maximum number of nodes settled in the search for a path that makes a shortcut unnecessary
+        """
+        graph = compact_graph.as_compact(G, objectives)
+        if graph.directed:
+            raise ValueError("Contraction hierarchies are only supported for undirected graphs")
+
+        self.graph = graph
+        self.objectives = tuple(objectives)
+        self.objective = self.objectives[0] if objective is None else objective
+        self.fingerprint = lower_bound_cache.graph_fingerprint(graph)
+
+        # Costs are compared as tuples with the objective to minimize first and the others as tie-breakers
+        self.order = [self.objectives.index(self.objective)]
+        self.order += [k for k in range(len(self.objectives)) if k != self.order[0]]
+        costs = graph.objective_costs(self.objectives)[:, self.order].tolist()
+
+        # Remaining graph: adjacency[u][w] = (cost, bypassed node) of the cheapest edge or shortcut between u and w
+        adjacency = [{} for _ in range(len(graph))]
+        indptr, indices = graph.indptr.tolist(), graph.indices.tolist()
+        for u in range(len(graph)):
+            for e in range(indptr[u], indptr[u + 1]):
+                w, cost = indices[e], tuple(costs[e])
+                if w != u and (w not in adjacency[u] or cost < adjacency[u][w][0]):
+                    adjacency[u][w] = (cost, -1)
+
+        rank = [-1] * len(graph)
+        deleted_neighbors = [0] * len(graph)
+        upward = [None] * len(graph)
+
+        queue = [(self._priority(v, adjacency, deleted_neighbors, witness_limit), v) for v in range(len(graph))]
+        heapq.heapify(queue)
+
+        # Lazy updates: a node is only contracted if its priority is still the lowest after recomputing it
+        while queue:
+            _, v = heapq.heappop(queue)
+            priority = self._priority(v, adjacency, deleted_neighbors, witness_limit)
+            if queue and priority > queue[0][0]:
+                heapq.heappush(queue, (priority, v))
+                continue
+
+            for u, w, cost in self._shortcuts(v, adjacency, witness_limit):
+                if w not in adjacency[u] or cost < adjacency[u][w][0]:
+                    adjacency[u][w] = (cost, v)
+                    adjacency[w][u] = (cost, v)
+
+            rank[v] = len(graph) - len(queue) - 1
+            upward[v] = adjacency[v]  # All remaining neighbours are contracted later, i.e., higher in the hierarchy
+            for u in adjacency[v]:
+                del adjacency[u][v]
+                deleted_neighbors[u] += 1
+            adjacency[v] = {}
+
+        self.rank = np.array(rank, dtype=np.int64)
+        self._set_upward([sorted(edges.items()) for edges in upward])
+
+    def _set_upward(self, upward):
+        """
+        Stores the upward graph in CSR format, plus lists and an edge index for the queries
+        :param upward: For each node, a list of (head, (cost, bypassed node))
+        """
+        self.up_indptr = np.concatenate(([0], np.cumsum([len(edges) for edges in upward]))).astype(np.int64)
+        self.up_indices = np.array([w for edges in upward for w, _ in edges], dtype=np.int64)
+        self.up_costs = np.array([cost for edges in upward for _, (cost, _) in edges],
+                                 dtype=np.float64).reshape((-1, len(self.objectives)))
+        self.up_middle = np.array([m for edges in upward for _, (_, m) in edges], dtype=np.int64)
+        self._prepare()
+
+    def _prepare(self):
+        """
+        Python lists of the upward graph for the queries, and the index of each upward edge by its endpoints
+        """
+        self._indptr = self.up_indptr.tolist()
+        self._indices = self.up_indices.tolist()
+        self._costs = [tuple(cost) for cost in self.up_costs.tolist()]
+        self._middle = self.up_middle.tolist()
+        self._edge = {}
+        for u in range(len(self._indptr) - 1):
+            for e in range(self._indptr[u], self._indptr[u + 1]):
+                self._edge[(u, self._indices[e])] = e
+
+    @staticmethod
+    def _shortcuts(v, adjacency, witness_limit):
+        """
+        Shortcuts needed to contract v: one for each pair of neighbours without a path of at most the same cost avoiding v
+        :param v: Node
+        :param adjacency: Remaining graph
+        :param witness_limit: Maximum number of nodes settled per witness search
+        :return: List of (u, w, cost)
+        """
+        neighbors = list(adjacency[v].items())
+        shortcuts = []
+
+        for i, (u, (cost_u, _)) in enumerate(neighbors):
+            targets = {w: tuple(a + b for a, b in zip(cost_u, cost_w)) for w, (cost_w, _) in neighbors[i + 1:]}
+            if not targets:
+                continue
+            limit = max(targets.values())
+
+            # Witness search: Dijkstra from u in the remaining graph without v, up to the most expensive shortcut
+            dist = {u: tuple(0.0 for _ in cost_u)}
+            heap = [(dist[u], u)]
+            settled = 0
+            while heap and settled < witness_limit:
+                d, x = heapq.heappop(heap)
+                if d > dist[x]:
+                    continue
+                if d > limit:
+                    break
+                settled += 1
+                for y, (cost, _) in adjacency[x].items():
+                    if y == v:
+                        continue
+                    result = tuple(a + b for a, b in zip(d, cost))
+                    if y not in dist or result < dist[y]:
+                        dist[y] = result
+                        heapq.heappush(heap, (result, y))
+
+            for w, cost in targets.items():
+                if w not in dist or dist[w] > cost:
+                    shortcuts.append((u, w, cost))
+
+        return shortcuts
+
+    def _priority(self, v, adjacency, deleted_neighbors, witness_limit):
+        """
+        :return: Edge difference of contracting v, plus the number of its neighbours that are already contracted
+        """
+        return len(self._shortcuts(v, adjacency, witness_limit)) - len(adjacency[v]) + deleted_neighbors[v]
+
+    def query(self, S, T):
+        """
+        Finds the lexicographically best path from S to T
+        :param S: Starting node
+        :param T: Terminating (ending) node
+        :return: Path as a list of node labels; Its cost vector, in the order of objectives
+        """
+        s_index, t_index = self.graph.index(S), self.graph.index(T)
+        indptr, indices, costs = self._indptr, self._indices, self._costs
+
+        # Forward search from S and backward search from T, both only going up the hierarchy
+        dist = [{s_index: tuple(0.0 for _ in self.objectives)}, {t_index: tuple(0.0 for _ in self.objectives)}]
+        parent = [{s_index: -1}, {t_index: -1}]
+        heaps = [[(dist[0][s_index], s_index)], [(dist[1][t_index], t_index)]]
+        best, meet = None, -1
+
+        while heaps[0] or heaps[1]:
+            side = 0 if heaps[0] and (not heaps[1] or heaps[0][0] <= heaps[1][0]) else 1
+            d, x = heapq.heappop(heaps[side])
+            if best is not None and d >= best:  # Nothing cheaper can be found on this side
+                heaps[side] = []
+                continue
+            if d > dist[side][x]:
+                continue
+
+            if x in dist[1 - side]:
+                total = tuple(a + b for a, b in zip(d, dist[1 - side][x]))
+                if best is None or total < best:
+                    best, meet = total, x
+
+            for e in range(indptr[x], indptr[x + 1]):
+                y = indices[e]
+                result = tuple(a + b for a, b in zip(d, costs[e]))
+                if y not in dist[side] or result < dist[side][y]:
+                    dist[side][y] = result
+                    parent[side][y] = x
+                    heapq.heappush(heaps[side], (result, y))
+
+        if best is None:
+            raise nx.NetworkXNoPath(f"No path between {S} and {T}.")
+
+        # Hierarchy path: up from S to the meeting node, then down to T
+        path = [meet]
+        while parent[0][path[-1]] != -1:
+            path.append(parent[0][path[-1]])
+        path.reverse()
+        while parent[1][path[-1]] != -1:
+            path.append(parent[1][path[-1]])
+
+        return self._unpack(path)
+
+    def _unpack(self, path):
+        """
+        Replaces the shortcuts on a path by the edges they bypass
+        :param path: List of node ids, consecutive nodes are joined by an upward edge
+        :return: Path as a list of node labels; Its cost vector, in the order of objectives
+        """
+        nodes = [path[0]]
+        total = [0.0] * len(self.objectives)
+        stack = [(a, b) for a, b in zip(path[:-1], path[1:])][::-1]
+
+        while stack:
+            a, b = stack.pop()
+            e = self._edge[(a, b)] if (a, b) in self._edge else self._edge[(b, a)]
+            middle = self._middle[e]
+            if middle == -1:
+                nodes.append(b)
+                for k, cost in zip(self.order, self._costs[e]):  # Summed edge by edge along the path
+                    total[k] += cost
+            else:
+                stack.append((middle, b))
+                stack.append((a, middle))
+
+        return self.graph.path_to_nodes(nodes), np.array(total)
+
+    def save(self, path):
+        """
+        Writes the hierarchy to a .npz file, so that it is built only once per graph and objective
+        :param path: Path of the .npz file
+        """
+        np.savez(path, rank=self.rank, up_indptr=self.up_indptr, up_indices=self.up_indices, up_costs=self.up_costs,
+                 up_middle=self.up_middle, objectives=np.array(self.objectives), objective=self.objective,
+                 fingerprint=self.fingerprint)
+
+    @classmethod
+    def load(cls, path, G):
+        """
+        Reads a hierarchy written by save()
+        :param path: Path of the .npz file
+        :param G: The graph the hierarchy was built for
+        :return: ContractionHierarchy
+        """
+        with np.load(path) as data:
+            hierarchy = cls.__new__(cls)
+            hierarchy.objectives = tuple(data['objectives'].tolist())
+            hierarchy.objective = str(data['objective'])
+            hierarchy.fingerprint = str(data['fingerprint'])
+            for name in ('rank', 'up_indptr', 'up_indices', 'up_costs', 'up_middle'):
+                setattr(hierarchy, name, data[name])
+
+        hierarchy.graph = compact_graph.as_compact(G, hierarchy.objectives)
+        if lower_bound_cache.graph_fingerprint(hierarchy.graph) != hierarchy.fingerprint:
+            raise ValueError("The contraction hierarchy was built for a different graph")
+
+        hierarchy.order = [hierarchy.objectives.index(hierarchy.objective)]
+        hierarchy.order += [k for k in range(len(hierarchy.objectives)) if k != hierarchy.order[0]]
+        hierarchy._prepare()
+        return hierarchy
+
+
+def build_hierarchies(G, objectives, cache_dir=None):
+    """
+    One contraction hierarchy per objective, read from cache_dir if they were built before
+    :param G: Multi-objective search graph G = (V, E), either a networkx graph or a CompactGraph
+    :param objectives: Objectives
+    :param cache_dir: Directory of the .npz files. By default (i.e., cache_dir=None), nothing is written to disk
+    :return: Dictionary {objective: ContractionHierarchy}
+    """
+    graph = compact_graph.as_compact(G, objectives)
+    fingerprint = lower_bound_cache.graph_fingerprint(graph) if cache_dir is not None else None
+    hierarchies = {}
+
+    for objective in objectives:
+        path = None if cache_dir is None else os.path.join(cache_dir, f"ch_{objective}_{fingerprint}.npz")
+        if path is not None and os.path.exists(path):
+            hierarchies[objective] = ContractionHierarchy.load(path, graph)
+            continue
+
+        hierarchies[objective] = ContractionHierarchy(graph, objectives, objective)
+        if path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            hierarchies[objective].save(path)
+
+    return hierarchies
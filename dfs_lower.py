@@ -1,84 +1,60 @@
 """
 Inner-loop: Finds paths with value vectors in the target region
 Depth-first search (DFS) algorithm, guided by the lower bounds,
-obtained from the Single-objective value iteration (i.e., single_vi_iter.py)
+obtained from the Single-objective value iteration (i.e., single_vi_iter.py).
+Each node keeps the Pareto set of the costs of the partial paths expanded there,
+so that partial paths which are dominated by (or equal to) one of them are not expanded again.
 """
 
 import numpy as np
-import single_vi_iter
-import time
+from inner_search import InnerSearch
 
 
-def dfs_lower(G, S, T, t, U, max_iter=None):
+def dfs_lower(G, S, T, t, U, max_iter=None, objectives=('length', 'crossing'), cache=None, time_budget=None,
+              on_improve=None):
     """
     Given a target t, the method finds the shortest path from S to T, guided by the lower bounds.
-    :param G: Multi-objective search graph G = (V, E)
+    :param G: Multi-objective search graph G = (V, E), either a networkx graph or a CompactGraph
     :param S: Starting node
     :param T: Terminating (ending) node
     :param t: Target
     :param U: Upper bounds, computed in the outer_loop.py
     :param max_iter: Maximum iterations. By default (i.e., max_iter=None), the algorithm runs until convergence.
     For experimenting with stopping criteria, set the max_iter to a number
-    :return Shortest path and its cost; Updated upper bounds
+    :param objectives: Objectives, in the same order as the entries of t and U
+    :param cache: LowerBoundCache (i.e., lower_bound_cache.py) to reuse the lower bounds of earlier calls with the same G and T.
+    Or Landmarks (i.e., landmarks.py) for lower bounds towards any T without computing them per query.
+    By default (i.e., cache=None), the lower bounds are computed from scratch
+    :param time_budget: Wall-clock budget in milliseconds. By default (i.e., time_budget=None), there is no time limit.
+    When the budget runs out, the best path found so far is returned
+    :param on_improve: Callback on_improve(path, cost), called every time a better path is found (i.e., U improves)
+    :return Best path found; Updated upper bounds, i.e., the cost of that path if one was found;
+    Whether the search ran to completion, i.e., the path is proven optimal for the target region
     """
-    start = time.time()
-
-    lower_length = single_vi_iter.single_value_iter(G, T, 'length')
-    lower_crossing = single_vi_iter.single_value_iter(G, T, 'crossing')
-
-    i = 0  # track iterations of the algorithm
-
-    cost_history = np.array([0, 0])  # Cost of the path we've seen so far
-
-    stack = [(S, cost_history, [S])]  # (starting node, cost so far, path), where path is from S to current_state
-
-    current_best_path = []
+    search = InnerSearch(G, S, T, t, U, objectives, cache, max_iter, time_budget, on_improve)
+    labels = search.labels
+    stack = [search.first]  # Starting node with the cost of the path we've seen so far
 
     # while i in range(max_iter):
     while stack:
-        current_node, current_cost, path = stack.pop()  # current_cost is the total cost up to the current_node
-
-        if current_node == T:
-            if np.all(np.less_equal(current_cost, U)):
-                U = current_cost  # Update the upper bound as full exact path to T is an upper bound with value=current_cost
-                current_best_path = path.copy()
+        label = stack.pop()
 
+        if labels.node[label] == search.t_index:
+            search.reach(label)
             continue
 
-        neighbor_list = []  # List of all neighbor nodes
-
-        for neighbor in G.neighbors(current_node):
-            edge = G[current_node][neighbor]
-            edge_list = [v for k, v in edge.items()]  # Stores only the values of the edges' properties
-
-            # cost = np.array([edge['length'], edge['crossing']]) # Use for dummy graph
-            cost = np.array([edge_list[0]['length'], edge_list[0]['crossing']])  # Cost in both objectives to go from S to neighbor
-
-            result = current_cost + cost + np.array([lower_length[neighbor], lower_crossing[neighbor]])  # This is the new lower bound
-
-            # Pruning paths that won't be Pareto-better compared to the current upper bound
-            if np.any(np.greater(result, U)):  # If it's outside of target region, ignore it
-                continue
-
-            distance = np.sum(np.abs(t - result))  # Manhattan distance to see how close we are to the target
+        if not search.settle(label):
+            continue
 
-            neighbor_list.append((neighbor, distance, (current_cost + cost)))
+        new_labels, distance = search.expand(label)
 
         # The goal is to be as close as possible to the target
-        neighbor_list.sort(key=lambda x: x[1], reverse=True)  # Sorts in descending order w.r.t. distance
-        for n in neighbor_list:
-            path_copy = path.copy()
-            path_copy.append(n[0])
-            stack.append((n[0], n[2], path_copy))  # (neighbor, cost, path)
+        order = np.argsort(-distance, kind='stable')  # Sorts in descending order w.r.t. distance
+        stack.extend(new_labels[order].tolist())
 
-        i += 1
-        if max_iter is not None and i >= max_iter:
-            print("The algorithm has reached the given maximum iterations, but has found no solution.")
+        if search.out_of_budget():
             break
 
-    print(f'DFS iterations: {i}')
-    end = time.time()
-    elapsed_seconds = (end - start)
-    print("DFS time elapsed in seconds: " + str(elapsed_seconds))
+    optimal = not stack  # Nothing left to search in the target region, so no better path exists
 
-    return current_best_path, U
+    return search.result('DFS', optimal)
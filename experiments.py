@@ -1,12 +1,14 @@
 # Import libraries
-import geopandas as gpd
-import momepy
 import networkx as nx
 import numpy as np
 from matplotlib import colors
 import matplotlib.pyplot as plt
 import matplotlib
+import chain_contraction
+import contraction_hierarchy
+import graph_cache
 import outer_loop
+import spatial_index
 from lmzintgraf_gp_pref_elicit.gp_utilities import utils_user
 
 # Legend
@@ -20,14 +22,11 @@ new_cmap = colors.ListedColormap(new_cmap)
 # Plot
 fig, ax = plt.subplots(figsize=(14, 14), dpi=600)
 
-# Map
-map_amsterdam = gpd.read_file("Sidewalk_width_crossings.geojson")
-
 # Objectives
 objectives = ('length', 'crossing')
 
-# Create a NetworkX graph from the map
-G = momepy.gdf_to_nx(map_amsterdam, approach='primal')
+# Map, converted once into a compact graph file (see graph_cache.py) and loaded from there afterwards
+graph = graph_cache.load_graph("Sidewalk_width_crossings.geojson", objectives=objectives)
 
 #Full map ~11401 nodes and radius 800m
 S = (119998.5393221767, 485722.64175419795) # very first
@@ -37,15 +36,27 @@ T = (121544.5105401219, 486594.5264401745) # very last
 # S = (120548.6120283842, 486088.19577846595)
 # T = (121015.06629881046, 485829.2834579833)
 
+# Any coordinates can be given for S and T, they are snapped to the nearest nodes of the map
+S, T = spatial_index.SpatialIndex(graph).snap_nodes([S, T])
+
+# Routing graph: chains of degree-2 nodes merged into single edges (see chain_contraction.py), S and T are kept
+routing_graph, expansion = chain_contraction.contract_chains(graph, objectives, keep=(S, T))
+
+# Contraction hierarchies for the point-to-point queries, built once per objective and loaded from there afterwards
+hierarchies = contraction_hierarchy.build_hierarchies(routing_graph, objectives, cache_dir='graph_cache')
+
 # Distance between S and T
-p_ST = nx.shortest_path(G, source=S, target=T, weight='length', method='dijkstra')  # Dijkstra's algorithm
-# Computes the total cost associated with the path and objective, i.e., the value of the path
-distance = nx.path_weight(G, path=p_ST, weight='length')
+p_ST, val_ST = hierarchies['length'].query(S, T)  # Shortest path and its value for each objective
+distance = val_ST[objectives.index('length')]
 print(f"Distance between S and T is {distance*0.001}km.")
 
 # The path from my proposed algorithm
-t, p_star, val_vector_p_star, p_star_utility, P, val_p = outer_loop.outer(G, S, T, objectives)
-print(f"Target {t}; Path with cost {val_vector_p_star}")
+t, p_star, val_vector_p_star, p_star_utility, P, val_p = outer_loop.outer(routing_graph, S, T, objectives, hierarchies=hierarchies)
+print(f"Target {t}; Path with cost {val_vector_p_star[-1]}")
+
+# Paths as node sequences of the original map, for plotting
+p_star = chain_contraction.expand_path(p_star, expansion)
+P = [chain_contraction.expand_path(path, expansion) for path in P]
 
 # Alternative paths from the Pareto set P
 for i, path in enumerate(P):
@@ -63,6 +74,9 @@ for i, path in enumerate(P):
 
 ### Plot experiments ###
 
+# NetworkX graph of the map, only needed for plotting
+G = graph.to_networkx()
+
 # All nodes and edges
 nx.draw(G, {n: [n[0], n[1]] for n in list(G.nodes)}, ax=ax, node_size=3)
 
@@ -0,0 +1,106 @@
+"""
+Graph cache: Converts a sidewalk GeoJSON map into a compact graph file once, so that later runs skip
+the geopandas parsing and momepy.gdf_to_nx. Only the endpoints of each LineString and the cost
+of each objective are kept (i.e., compact_graph.py). Cache files are keyed by the path, size and modification time
+of the source file, so an updated map is converted again without reading the map to find its cache file.
+With mmap=True the graph is stored as a directory of .npy files that is opened memory-mapped,
+so that parallel worker processes share one read-only copy of the graph.
+
+Usage:
+    python graph_cache.py Sidewalk_width_crossings.geojson [--mmap]
+"""
+
+import argparse
+import hashlib
+import os
+import time
+
+from compact_graph import CompactGraph
+
+
+def source_key(path):
+    """
+    :param path: Path of the source file
+    :return: (absolute path, size, modification time in nanoseconds) of the file, which change when the file does
+    """
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+def cache_path(geojson_path, cache_dir='graph_cache', objectives=('length', 'crossing'), mmap=False):
+    """
+    :param geojson_path: Path of the GeoJSON map
+    :param cache_dir: Directory of the cache files
+    :param objectives: Objectives stored in the cache file
+    :param mmap: Whether the cache is a memory-mapped graph store (a directory) instead of a .npz file
+    :return: Path of the cache file for the current contents of the map
+    """
+    name = os.path.splitext(os.path.basename(geojson_path))[0]
+    key = hashlib.sha1(repr((source_key(geojson_path), tuple(objectives))).encode()).hexdigest()[:16]
+    if mmap:
+        return os.path.join(cache_dir, f"{name}_{key}")
+    return os.path.join(cache_dir, f"{name}_{key}.npz")
+
+
+def build_graph_cache(geojson_path, cache_dir='graph_cache', objectives=('length', 'crossing'), mmap=False):
+    """
+    Parses the GeoJSON map and writes its compact graph to the cache
+    :param geojson_path: Path of the GeoJSON map
+    :param cache_dir: Directory of the cache files
+    :param objectives: Objectives stored in the cache file
+    :param mmap: Whether to write a memory-mapped graph store (a directory) instead of a .npz file
+    :return: Path of the cache file
+    """
+    # Only needed for preprocessing, loading a cached graph works without them
+    import geopandas as gpd
+    import momepy
+
+    map_amsterdam = gpd.read_file(geojson_path)
+    G = momepy.gdf_to_nx(map_amsterdam, approach='primal')
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(geojson_path, cache_dir, objectives, mmap)
+    graph = CompactGraph.from_networkx(G, objectives)
+
+    if mmap:
+        graph.write_mmap(path)
+    else:
+        graph.save(path)  # Written next to path and renamed, so load_graph in another process never opens half a file
+
+    return path
+
+
+def load_graph(geojson_path, cache_dir='graph_cache', objectives=('length', 'crossing'), mmap=False):
+    """
+    Opens the compact graph of a GeoJSON map, building the cache file first if it does not exist yet
+    :param geojson_path: Path of the GeoJSON map
+    :param cache_dir: Directory of the cache files
+    :param objectives: Objectives stored in the cache file
+    :param mmap: Whether to open a read-only memory-mapped graph store, e.g., in each of several worker processes
+    :return: CompactGraph of the map
+    """
+    path = cache_path(geojson_path, cache_dir, objectives, mmap)
+
+    if mmap:
+        if not os.path.exists(os.path.join(path, 'meta.json')):
+            path = build_graph_cache(geojson_path, cache_dir, objectives, mmap)
+        return CompactGraph.open_mmap(path)
+
+    if not os.path.exists(path):
+        path = build_graph_cache(geojson_path, cache_dir, objectives)
+
+    return CompactGraph.load(path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convert GeoJSON sidewalk maps into compact graph files.")
+    parser.add_argument('geojson', nargs='+', help="GeoJSON map(s) to convert")
+    parser.add_argument('--cache-dir', default='graph_cache', help="Directory of the cache files")
+    parser.add_argument('--objectives', nargs='+', default=['length', 'crossing'], help="Objectives to store")
+    parser.add_argument('--mmap', action='store_true', help="Write a memory-mapped graph store for worker processes")
+    args = parser.parse_args()
+
+    for geojson in args.geojson:
+        start = time.time()
+        path = build_graph_cache(geojson, args.cache_dir, tuple(args.objectives), args.mmap)
+        print(f"{geojson} -> {path} in {time.time() - start:.2f} seconds")
@@ -0,0 +1,134 @@
+"""
+Steps shared by the inner-loop searches (i.e., dfs_lower.py and best_first_lower.py), which differ only in the order
+in which they expand the partial paths: the lower bounds, the paths that reach T, the dominance pruning per node,
+the expansion of all arcs of a node at once, and the iteration and time budget
+"""
+
+import time
+
+import numpy as np
+
+import compact_graph
+import lower_bound_cache
+import pareto_front
+from label_store import LabelStore
+
+
+class InnerSearch:
+    """
+    State of one inner-loop search for a target t: the partial paths as labels (node, cost so far, parent label),
+    the Pareto set of the costs of the partial paths expanded at each node, the upper bounds U and the best path so far.
+    The parameters are those of the inner loops
+    """
+
+    def __init__(self, G, S, T, t, U, objectives, cache=None, max_iter=None, time_budget=None, on_improve=None):
+        self.start = time.time()
+        self.deadline = None if time_budget is None else self.start + time_budget / 1000
+        self.objectives = objectives
+        self.max_iter = max_iter
+        self.on_improve = on_improve
+
+        # Array-based view of G: arcs of node u are indices[indptr[u]:indptr[u+1]] with their cost vectors in costs
+        self.graph = compact_graph.as_compact(G, objectives)
+        self.costs = self.graph.objective_costs(objectives)
+        self.t_index = self.graph.index(T)
+        self.t, self.U = t, U
+
+        # Lower bounds for every node and objective, computed in one sweep from T
+        self.lower = lower_bound_cache.lower_bounds(self.graph, T, objectives, cache)
+
+        self.i = 0  # track iterations of the algorithm
+
+        # Partial paths are labels in an arena, the path itself is only rebuilt at T
+        self.labels = LabelStore(len(objectives))
+        self.first = self.labels.add(self.graph.index(S), np.zeros(len(objectives)))  # Starting node with no cost so far
+
+        self.expanded = {}  # Per node, the Pareto set of the costs of the partial paths expanded there
+
+        self.best_path = []
+
+    def reach(self, label):
+        """
+        Takes the path of a label at T if it is in the target region, which then shrinks to the cost of that path.
+        Once a path is taken, a path with the same cost is not: labels at T are not pruned by dominance,
+        so several paths (or parallel arcs) with the same cost can reach T
+        :param label: Label whose node is T
+        :return: Whether the path was taken
+        """
+        current_cost = self.labels.cost[label]
+        if not np.all(np.less_equal(current_cost, self.U)):
+            return False
+        if self.best_path and not np.any(np.less(current_cost, self.U)):
+            return False
+
+        self.U = current_cost.copy()  # Update the upper bound as full exact path to T is an upper bound with value=current_cost
+        self.best_path = self.graph.path_to_nodes(self.labels.path(label))
+
+        if self.on_improve is not None:
+            self.on_improve(self.best_path, self.U.copy())
+        return True
+
+    def settle(self, label):
+        """
+        Dominance pruning: a partial path that is not better than one already expanded at its node can't lead to a
+        better path
+        :return: Whether the label is to be expanded, in which case its cost joins the Pareto set of its node
+        """
+        current_node = self.labels.node[label]
+        if current_node not in self.expanded:
+            self.expanded[current_node] = pareto_front.make_front(len(self.objectives))
+        return self.expanded[current_node].insert(tuple(self.labels.cost[label].tolist()))
+
+    def expand(self, label):
+        """
+        Follows all arcs leaving the node of a label at once
+        :return: Labels of the neighbours that can still lead into the target region, in the order of the arcs;
+        Manhattan distance between the lower bound of each and the target
+        """
+        current_node, current_cost = self.labels.node[label], self.labels.cost[label]  # current_cost is the total cost up to the current_node
+
+        arcs = slice(self.graph.indptr[current_node], self.graph.indptr[current_node + 1])
+        neighbors = self.graph.indices[arcs]
+        cost = current_cost + self.costs[arcs]  # Cost in all objectives to go from S to each neighbor
+
+        result = cost + self.lower[neighbors]  # This is the new lower bound
+
+        # Pruning paths that won't be Pareto-better compared to the current upper bound
+        inside = ~np.any(np.greater(result, self.U), axis=1)  # If it's outside of target region, ignore it
+
+        # Pruning paths that are dominated at the neighbor already
+        for k in np.flatnonzero(inside):
+            front = self.expanded.get(neighbors[k])
+            if front is not None and front.dominates(cost[k]):
+                inside[k] = False
+
+        distance = np.sum(np.abs(self.t - result[inside]), axis=1)  # Manhattan distance to see how close we are to the target
+
+        return self.labels.add_many(neighbors[inside], cost[inside], label), distance
+
+    def out_of_budget(self):
+        """
+        Counts an iteration
+        :return: Whether the search has to stop, as it has used up max_iter or its time budget
+        """
+        self.i += 1
+        if self.max_iter is not None and self.i >= self.max_iter:
+            print("The algorithm has reached the given maximum iterations.")
+            return True
+        if self.deadline is not None and time.time() >= self.deadline:
+            print("The algorithm has run out of its time budget.")
+            return True
+        return False
+
+    def result(self, name, optimal):
+        """
+        :param name: Name of the search in the printed statistics
+        :param optimal: Whether the search ran to completion
+        :return Best path found; Updated upper bounds; optimal
+        """
+        print(f'{name} iterations: {self.i}')
+        end = time.time()
+        elapsed_seconds = (end - self.start)
+        print(f"{name} time elapsed in seconds: " + str(elapsed_seconds))
+
+        return self.best_path, self.U, optimal
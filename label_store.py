@@ -0,0 +1,85 @@
+"""
+Label store: Arena for the partial paths (labels) of the inner-loop searches.
+A label is a node id, the cost vector of the path up to that node, and the index of its parent label,
+kept in preallocated NumPy arrays that double in size when full.
+A path is only rebuilt, by following the parent indices back to S, when it is needed.
+"""
+
+import numpy as np
+
+
+class LabelStore:
+    """
+    Labels (node id, cost vector, parent label) in growing NumPy arrays
+    """
+
+    def __init__(self, num_objectives, capacity=1024):
+        """
+        :param num_objectives: Length of the cost vectors
+        :param capacity: Number of labels to preallocate
+        """
+        self.node = np.empty(capacity, dtype=np.int64)
+        self.cost = np.empty((capacity, num_objectives), dtype=np.float64)
+        self.parent = np.empty(capacity, dtype=np.int64)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, node, cost, parent=-1):
+        """
+        :param node: Node id
+        :param cost: Cost vector of the path from S to the node
+        :param parent: Label of the path without its last node; -1 for the path that only contains S
+        :return: The new label
+        """
+        self._reserve(1)
+        label = self.size
+        self.node[label] = node
+        self.cost[label] = cost
+        self.parent[label] = parent
+        self.size += 1
+        return label
+
+    def add_many(self, nodes, costs, parent):
+        """
+        Adds the extensions of one label to several nodes at once
+        :param nodes: Array of node ids
+        :param costs: Array with a cost vector for each node
+        :param parent: Label the new labels extend
+        :return: Array of the new labels, in the order of nodes
+        """
+        count = len(nodes)
+        self._reserve(count)
+        start, end = self.size, self.size + count
+        self.node[start:end] = nodes
+        self.cost[start:end] = costs
+        self.parent[start:end] = parent
+        self.size = end
+        return np.arange(start, end)
+
+    def path(self, label):
+        """
+        :param label: Label
+        :return: List of the node ids on the path from S to the node of the label
+        """
+        path = []
+        while label != -1:
+            path.append(int(self.node[label]))
+            label = self.parent[label]
+        return path[::-1]
+
+    def _reserve(self, count):
+        """
+        Makes room for count more labels, doubling the arrays if needed
+        :param count: Number of labels to add
+        """
+        if self.size + count <= len(self.node):
+            return
+
+        capacity = max(2 * len(self.node), self.size + count)
+        self.node = np.resize(self.node, capacity)
+        self.parent = np.resize(self.parent, capacity)
+        cost = np.empty((capacity, self.cost.shape[1]), dtype=np.float64)
+        cost[:self.size] = self.cost[:self.size]
+        self.cost = cost
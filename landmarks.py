@@ -0,0 +1,164 @@
+"""
+Landmark lower bounds (ALT: A*, Landmarks and the Triangle inequality):
+A few landmark nodes are picked on the graph once, and the single-objective distances (i.e., single_vi_iter.py)
+to and from each landmark are stored for every node and objective. By the triangle inequality,
+for any landmark L and nodes n, T:  d(n, T) >= d(n, L) - d(T, L)  and  d(n, T) >= d(L, T) - d(L, n),
+so a lower bound for any (n, T) pair is the largest of these over the landmarks, in O(k) for k landmarks.
+
+Goldberg, A. V., & Harrelson, C. (2005). Computing the shortest path: A* search meets graph theory.
+Proceedings of the 16th ACM-SIAM Symposium on Discrete Algorithms, 156-165.
+"""
+
+import numpy as np
+
+import compact_graph
+import lower_bound_cache
+import single_vi_iter
+
+
+class Landmarks(lower_bound_cache.FingerprintMemo):
+    """
+    Distances to and from k landmarks, for every node and objective.
+    Has the same get(G, T, objectives) method as LowerBoundCache, so it can be passed as the cache of the inner loops
+    to get lower bounds for any T without running the single-objective value iteration for it.
+    """
+
+    def __init__(self, G, objectives, num_landmarks=16, seed=None):
+        """
+        Picks the landmarks by farthest-point selection on the first objective and computes their distances
+        :param G: Multi-objective search graph G = (V, E), either a networkx graph or a CompactGraph
+        :param objectives: Objectives
+        :param num_landmarks: Number of landmarks k
+        :param seed: Seed for the random choice of the node the selection starts from
+        """
+        graph = compact_graph.as_compact(G, objectives)
+        self.objectives = tuple(objectives)
+        self.directed = graph.directed
+        self.fingerprint = lower_bound_cache.graph_fingerprint(graph)
+        self.reverse_fingerprint = lower_bound_cache.graph_fingerprint(graph.reverse()) if graph.directed else None
+
+        num_landmarks = min(num_landmarks, len(graph))
+        nodes = graph.nodes
+
+        # to_landmark[l, n] = d(n, L_l), from_landmark[l, n] = d(L_l, n), one column per objective
+        self.landmarks = []
+        self.to_landmark = np.empty((num_landmarks, len(graph), len(self.objectives)))
+        self.from_landmark = np.empty((num_landmarks, len(graph), len(self.objectives)))
+
+        # The node farthest from all landmarks chosen so far becomes the next one; unreachable nodes come first
+        closest = np.full(len(graph), np.inf)
+        landmark = np.random.default_rng(seed).integers(len(graph))
+
+        for l in range(num_landmarks):
+            self.landmarks.append(int(landmark))
+            self.to_landmark[l] = single_vi_iter.multi_objective_lower_bounds(graph, nodes[landmark], self.objectives)
+            if graph.directed:
+                self.from_landmark[l] = single_vi_iter.multi_objective_lower_bounds(graph.reverse(), nodes[landmark],
+                                                                                    self.objectives)
+            else:
+                self.from_landmark[l] = self.to_landmark[l]
+
+            closest = np.minimum(closest, self.to_landmark[l][:, 0])
+            closest[self.landmarks] = -1  # Never pick a landmark twice
+            landmark = np.argmax(closest)
+
+        self.node_index = graph.node_index
+
+    def __len__(self):
+        return len(self.landmarks)
+
+    def lower_bounds(self, T, objectives=None, reverse=False):
+        """
+        Lower bounds of every node towards T, from the triangle inequality
+        :param T: Terminating (ending) node
+        :param objectives: Objectives, a subset of the landmark objectives. By default (i.e., objectives=None), all of them
+        :param reverse: Whether the bounds are for the reversed graph, i.e., lower bounds on d(T, n) instead of d(n, T)
+        :return: Array of shape (number of nodes, number of objectives), rows follow the order of G.nodes
+        """
+        if objectives is None:
+            objectives = self.objectives
+        columns = [self.objectives.index(objective) for objective in objectives]
+        t_index = self.node_index[T]
+
+        to_landmark, from_landmark = self.to_landmark[:, :, columns], self.from_landmark[:, :, columns]
+        if reverse:
+            to_landmark, from_landmark = from_landmark, to_landmark
+
+        with np.errstate(invalid='ignore'):
+            bounds = np.maximum(to_landmark - to_landmark[:, t_index:t_index + 1],  # d(n, L) - d(T, L)
+                                from_landmark[:, t_index:t_index + 1] - from_landmark)  # d(L, T) - d(L, n)
+
+        # inf - inf: the landmark can't be reached from both nodes, so it says nothing about them
+        bounds = np.where(np.isnan(bounds), 0, bounds)
+        return np.maximum(bounds.max(axis=0), 0)
+
+    def lower_bound(self, n, T, objectives=None):
+        """
+        Lower bound of a single node towards T, in O(k) for k landmarks
+        :param n: Node
+        :param T: Terminating (ending) node
+        :param objectives: Objectives, a subset of the landmark objectives. By default (i.e., objectives=None), all of them
+        :return: Array with the lower bound for each objective
+        """
+        if objectives is None:
+            objectives = self.objectives
+        columns = [self.objectives.index(objective) for objective in objectives]
+        n_index, t_index = self.node_index[n], self.node_index[T]
+
+        to_landmark, from_landmark = self.to_landmark[:, :, columns], self.from_landmark[:, :, columns]
+        with np.errstate(invalid='ignore'):
+            bounds = np.maximum(to_landmark[:, n_index] - to_landmark[:, t_index],
+                                from_landmark[:, t_index] - from_landmark[:, n_index])
+
+        bounds = np.where(np.isnan(bounds), 0, bounds)
+        return np.maximum(bounds.max(axis=0), 0)
+
+    def get(self, G, T, objectives):
+        """
+        Same as LowerBoundCache.get: lower bounds of every node of G towards T
+        :param G: The graph the landmarks were computed for, or its reverse
+        :param T: Terminating (ending) node
+        :param objectives: Objectives
+        :return: Array of shape (number of nodes, number of objectives), rows follow the order of G.nodes
+        """
+        fingerprint = self.graph_fingerprint(G)
+
+        if fingerprint == self.fingerprint:
+            return self.lower_bounds(T, objectives)
+        if fingerprint == self.reverse_fingerprint:
+            return self.lower_bounds(T, objectives, reverse=True)
+        raise ValueError("The landmarks were computed for a different graph")
+
+    def save(self, path):
+        """
+        Writes the landmarks and their distances to a .npz file, so that they are computed only once per graph
+        :param path: Path of the .npz file
+        """
+        np.savez(path, landmarks=np.array(self.landmarks), to_landmark=self.to_landmark,
+                 from_landmark=self.from_landmark, objectives=np.array(self.objectives), directed=self.directed,
+                 fingerprints=np.array([self.fingerprint, self.reverse_fingerprint or '']))
+
+    @classmethod
+    def load(cls, path, G):
+        """
+        Reads landmarks written by save()
+        :param path: Path of the .npz file
+        :param G: The graph the landmarks were computed for
+        :return: Landmarks
+        """
+        with np.load(path) as data:
+            landmarks = cls.__new__(cls)
+            landmarks.objectives = tuple(data['objectives'].tolist())
+            landmarks.directed = bool(data['directed'])
+            landmarks.fingerprint, landmarks.reverse_fingerprint = data['fingerprints'].tolist()
+            landmarks.reverse_fingerprint = landmarks.reverse_fingerprint or None
+            landmarks.landmarks = data['landmarks'].tolist()
+            landmarks.to_landmark = data['to_landmark']
+            landmarks.from_landmark = data['from_landmark']
+
+        graph = compact_graph.as_compact(G, landmarks.objectives)
+        if lower_bound_cache.graph_fingerprint(graph) != landmarks.fingerprint:
+            raise ValueError("The landmarks were computed for a different graph")
+
+        landmarks.node_index = graph.node_index
+        return landmarks
@@ -14,6 +14,7 @@ for more detail on how we compute the GP updates.
 """
 import numpy as np
 from numpy.random import RandomState
+from scipy.linalg import cho_solve, cholesky, solve_triangular
 from scipy.stats import norm
 from lmzintgraf_gp_pref_elicit.gp_utilities import utils_data
 
@@ -47,16 +48,15 @@ class GPPairwise:
         # approximate utility values of the datapoints
         self.utility_vals = None
 
-        # covariance matrix of datapoints
-        self.cov_mat = None
-        self.cov_mat_inv = None
+        # lower cholesky factor L of the covariance matrix of datapoints, K = L L^T
+        self.cov_chol = None
 
-        # hessian (second derivative) of the pairwise likelihoods for observed data
-        self.hess_likelihood = None
-        self.hess_likelihood_inv = None
+        # K^(-1) (f_MAP - prior mean), needed for the predictive mean
+        self.alpha = None
 
-        # needed for predictive distribution (cov - hess_likelihood_inv)^(-1)
-        self.pred_cov_factor = None
+        # lower cholesky factor of B = I - L^T hess_likelihood L, with the hessian (second derivative)
+        # of the pairwise likelihoods for observed data at f_MAP; needed for the predictive covariance
+        self.posterior_chol = None
 
     def sample(self, sample_points):
         """
@@ -92,42 +92,84 @@ class GPPairwise:
 
         # otherwise compute predictive mean and covariance
         else:
-            cov_xnew_x = self._cov_mat(x_new, self.datapoints, noise=False)
             cov_x_xnew = self._cov_mat(self.datapoints, x_new, noise=False)
-            cov_xnew = self._cov_mat(x_new, noise=False)
-            pred_mean = self.prior_mean(x_new) + np.dot(np.dot(cov_xnew_x, self.cov_mat_inv),
-                                                        (self.utility_vals - self.prior_mean(self.datapoints)))
-            pred_var = cov_xnew - np.dot(np.dot(cov_xnew_x, self.pred_cov_factor), cov_x_xnew)
+            pred_mean = self.prior_mean(x_new) + np.dot(cov_x_xnew.T, self.alpha)
 
-        if pointwise:
+            # k^T (K - hess_likelihood^(-1))^(-1) k = v^T v - w^T w with v = L^(-1) k and w = chol(B)^(-1) v
+            v = solve_triangular(self.cov_chol, cov_x_xnew, lower=True, check_finite=False)
+            w = solve_triangular(self.posterior_chol, v, lower=True, check_finite=False)
+            if pointwise:
+                pred_var = self._kernel(x_new, x_new) - np.sum(v ** 2, axis=0) + np.sum(w ** 2, axis=0)
+            else:
+                pred_var = self._cov_mat(x_new, noise=False) - np.dot(v.T, v) + np.dot(w.T, w)
+
+        if pointwise and pred_var.ndim == 2:
             pred_var = pred_var.diagonal()
 
         return pred_mean, pred_var
 
-    def update(self, dataset):
+    def update(self, dataset, incremental=False):
         """
         Update the Gaussian process using the given data;
         call this before calling sample() or get_predictive_params()
         :param dataset:
+        :param incremental: if the dataset only appended datapoints (and comparisons) since the last update,
+                            start Newton-Raphson from the previous MAP estimate (and the predictive mean
+                            at the new datapoints), and extend the cholesky factor of the covariance matrix
+                            by the new rows instead of factorising it again; otherwise falls back to a full update
         """
+        f_init = None
+        num_old = 0 if self.datapoints is None else self.datapoints.shape[0]
+
+        if incremental and self.utility_vals is not None and dataset.datapoints.shape[0] >= num_old and \
+                np.array_equal(dataset.datapoints[:num_old], self.datapoints):
+            new_points = dataset.datapoints[num_old:]
+            f_init = self.utility_vals
+            if new_points.shape[0] > 0:
+                pred_mean, _ = self.get_predictive_params(new_points, pointwise=True)
+                f_init = np.concatenate((f_init, pred_mean))
+                self.cov_chol = self._extend_cov_chol(new_points)
+
         self.datapoints = dataset.datapoints
         self.comparisons = dataset.comparisons
 
-        # compute the covariance matrix given the new datapoints
-        self.cov_mat = self._cov_mat(self.datapoints)
-        self.cov_mat_inv = np.linalg.inv(self.cov_mat)
+        # factorise the covariance matrix given the new datapoints
+        if f_init is None:
+            self.cov_chol = _cholesky(self._cov_mat(self.datapoints))
 
         # compute the map estimate of f
-        self.utility_vals = self._compute_posterior()
+        self.utility_vals = self._compute_posterior(f_init)
+        self.alpha = cho_solve((self.cov_chol, True), self.utility_vals - self.prior_mean(self.datapoints),
+                               check_finite=False)
 
-        # compute the hessian of the likelihood given f_MAP
-        self.hess_likelihood = self._compute_hess_likelihood()
-        try:
-            self.hess_likelihood_inv = np.linalg.inv(self.hess_likelihood)
-        except:
-            self.hess_likelihood_inv = np.linalg.pinv(self.hess_likelihood)
+        # factorise B given the hessian of the likelihood at f_MAP
+        self.posterior_chol = self._posterior_chol(self._compute_hess_likelihood())
+
+    def _extend_cov_chol(self, new_points):
+        """
+        Cholesky factor of the covariance matrix for the current datapoints followed by new_points,
+        extending the current factor L by the new rows: [[L, 0], [C^T L^(-T), chol(D - C^T K^(-1) C)]]
+        :param new_points:  datapoints appended to the current ones
+        :return:            lower cholesky factor
+        """
+        cov_old_new = self._cov_mat(self.datapoints, new_points)
+        cov_new = self._cov_mat(new_points)
 
-        self.pred_cov_factor = np.linalg.inv(self.cov_mat - self.hess_likelihood_inv)
+        bottom_left = solve_triangular(self.cov_chol, cov_old_new, lower=True, check_finite=False).T
+        bottom_right = _cholesky(cov_new - np.dot(bottom_left, bottom_left.T))
+
+        return np.block([[self.cov_chol, np.zeros((self.cov_chol.shape[0], new_points.shape[0]))],
+                         [bottom_left, bottom_right]])
+
+    def _posterior_chol(self, hess_likelihood):
+        """
+        Cholesky factor of B = I - L^T hess_likelihood L, so that the hessian of the posterior is
+        hess_likelihood - K^(-1) = - L^(-T) B L^(-1)
+        :param hess_likelihood: hessian of the likelihood
+        :return:                lower cholesky factor of B
+        """
+        b_mat = np.eye(self.cov_chol.shape[0]) - np.dot(np.dot(self.cov_chol.T, hess_likelihood), self.cov_chol)
+        return _cholesky(b_mat)
 
     def _evaluate_prior(self, input_points):
         """
@@ -192,57 +234,49 @@ class GPPairwise:
         k = 0.8 ** 2 * np.exp(-(1. / (2. * (self.kernel_width ** 2))) * np.linalg.norm(x1 - x2, axis=1) ** 2)
         return k
 
-    def _compute_hess_likelihood(self, z=None):
+    def _compute_hess_likelihood(self, z=None, h=None):
         """
         Compute the hessian of the likelihood
+        :param z:   scaled utility differences of the comparisons; if None, computed from the MAP estimate
+        :param h:   comparison matrix (see _comparison_matrix), if already computed
         :return:
         """
+        # h[k, m] is 1 if datapoint m wins comparison k, -1 if it loses, so that entry (m, n) of the hessian
+        # sums over the comparisons of both m and n; it is zero for pairs that were never compared
+        if h is None:
+            h = self._comparison_matrix()
+
         if z is None:
             # compute z
-            f_winner = np.array([self.utility_vals[self.comparisons[i, 0]] for i in range(self.comparisons.shape[0])])
-            f_loser = np.array([self.utility_vals[self.comparisons[i, 1]] for i in range(self.comparisons.shape[0])])
-            z = (f_winner - f_loser) / (np.sqrt(2) * self.std_noise)
+            z = np.dot(h, self.utility_vals) / (np.sqrt(2) * self.std_noise)
 
         z_logpdf = norm.logpdf(z)
         z_logcdf = norm.logcdf(z)
 
-        # initialise with zeros
-        lambda_mat = np.zeros((self.datapoints.shape[0], self.datapoints.shape[0]))
-
-        # build up diagonal for pairs (xi, xi)
-        diag_arr = np.array([self._compute_hess_likelihood_entry(m, m, z, z_logpdf, z_logcdf) for m in
-                             range(self.datapoints.shape[0])])
-        np.fill_diagonal(lambda_mat, diag_arr)  # happens in-place
-
-        # go through the list of comparisons collected so far and update lambda
-        for k in range(self.comparisons.shape[0]):
-            m = self.comparisons[k, 0]  # winner
-            n = self.comparisons[k, 1]  # loser
-            lambda_mat[m, n] = self._compute_hess_likelihood_entry(m, n, z, z_logpdf, z_logcdf)
-            lambda_mat[n, m] = self._compute_hess_likelihood_entry(n, m, z, z_logpdf, z_logcdf)
+        p = np.exp(2. * z_logpdf - 2. * z_logcdf) + z * np.exp(z_logpdf - z_logcdf)
+        lambda_mat = - np.dot(h.T * p, h) / (2 * self.std_noise ** 2)
 
         # add jitter term to make lambda positive definite for computational stability
         lambda_mat += np.eye(self.datapoints.shape[0]) * 0.01
 
         return lambda_mat
 
-    def _compute_hess_likelihood_entry(self, m, n, z, z_logpdf, z_logcdf):
+    def _comparison_matrix(self):
         """
-        Get a single entry for the Hessian matrix at indices (m,n)
-        :param m:
-        :param n:
-        :param f:
-        :return:
+        :return:    matrix of shape [num_comparisons x num_datapoints], +1 for the winner and -1 for the loser
+                    of each comparison
         """
-        h_x_m = np.array(self.comparisons[:, 0] == m, dtype=int) - np.array(self.comparisons[:, 1] == m, dtype=int)
-        h_x_n = np.array(self.comparisons[:, 0] == n, dtype=int) - np.array(self.comparisons[:, 1] == n, dtype=int)
-        p = h_x_m * h_x_n * (np.exp(2. * z_logpdf - 2. * z_logcdf) + z * np.exp(z_logpdf - z_logcdf))
-        c = - np.sum(p) / (2 * self.std_noise ** 2)
-        return c
+        h = np.zeros((self.comparisons.shape[0], self.datapoints.shape[0]))
+        rows = np.arange(self.comparisons.shape[0])
+        h[rows, self.comparisons[:, 0]] += 1
+        h[rows, self.comparisons[:, 1]] -= 1
+        return h
 
-    def _compute_posterior(self):
+    def _compute_posterior(self, f_init=None):
         """
         Approximate the posterior distribution
+        :param f_init:  starting point of Newton-Raphson, e.g., the previous MAP estimate;
+                        if None, f_map is initialised randomly
         :return:    MAP of the gp values at current datapoints
         """
 
@@ -250,41 +284,36 @@ class GPPairwise:
         try_no = 0
 
         f_map = None
+        h = self._comparison_matrix()
 
         # using Newton-Raphson, approximate f_MAP
         while not converged and try_no < 1:
 
-            # randomly initialise f_map
-            f_map = self.random_state.uniform(0., 1., self.datapoints.shape[0])
+            # randomly initialise f_map (unless we have a starting point)
+            if f_init is None:
+                f_map = self.random_state.uniform(0., 1., self.datapoints.shape[0])
+            else:
+                f_map = np.array(f_init, dtype=float)
 
             for m in range(100):
 
                 # compute z
-                f_winner = np.array([f_map[self.comparisons[i, 0]] for i in range(self.comparisons.shape[0])])
-                f_loser = np.array([f_map[self.comparisons[i, 1]] for i in range(self.comparisons.shape[0])])
-                z = (f_winner - f_loser) / (np.sqrt(2) * self.std_noise)
+                z = np.dot(h, f_map) / (np.sqrt(2) * self.std_noise)
                 z_logpdf = norm.logpdf(z)
                 z_logcdf = norm.logcdf(z)
 
                 # compute b
-                h_j = np.array([np.array(self.comparisons[:, 0] == j, dtype=int) -
-                                np.array(self.comparisons[:, 1] == j, dtype=int) for j in
-                                range(self.datapoints.shape[0])])
-                b = np.sum(h_j * np.exp(z_logpdf - z_logcdf), axis=1) / (np.sqrt(2) * self.std_noise)
+                b = np.dot(h.T, np.exp(z_logpdf - z_logcdf)) / (np.sqrt(2) * self.std_noise)
 
                 # compute gradient g
-                g = - np.dot(self.cov_mat_inv, (f_map - self.prior_mean(self.datapoints))) + b
-
-                # compute approximation of the hessian of the posterior
-                hess_likelihood = self._compute_hess_likelihood(z)
-                hess_posterior = - self.cov_mat_inv + hess_likelihood
-                try:
-                    hess_posterior_inv = np.linalg.inv(hess_posterior)
-                except:
-                    hess_posterior_inv = np.linalg.pinv(hess_posterior)
-
-                # perform update
-                update = np.dot(hess_posterior_inv, g)
+                g = - cho_solve((self.cov_chol, True), f_map - self.prior_mean(self.datapoints), check_finite=False) + b
+
+                # compute approximation of the hessian of the posterior, - L^(-T) B L^(-1)
+                posterior_chol = self._posterior_chol(self._compute_hess_likelihood(z, h))
+
+                # perform update: the hessian of the posterior, inverted, times g is - L B^(-1) L^T g
+                update = - np.dot(self.cov_chol, cho_solve((posterior_chol, True), np.dot(self.cov_chol.T, g),
+                                                           check_finite=False))
                 f_map -= update
 
                 # stop criterion
@@ -297,3 +326,22 @@ class GPPairwise:
                 try_no += 1
 
         return f_map
+
+
+def _cholesky(mat, max_tries=10):
+    """
+    Lower cholesky factor of a symmetric matrix; if it is not (numerically) positive definite,
+    jitter is added to the diagonal, growing tenfold each try
+    :param mat:         symmetric matrix
+    :param max_tries:   number of jitter values to try
+    :return:            lower cholesky factor L with L L^T = mat + jitter * I
+    """
+    scale = max(np.mean(np.abs(np.diag(mat))), 1e-10)
+    jitter = 0.
+    for try_no in range(max_tries + 1):
+        jitter = 0. if try_no == 0 else scale * 1e-10 * 10 ** (try_no - 1)
+        try:
+            return cholesky(mat + jitter * np.eye(mat.shape[0]), lower=True, check_finite=False)
+        except np.linalg.LinAlgError:
+            pass
+    raise np.linalg.LinAlgError("Matrix is not positive definite, even with jitter {}".format(jitter))
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vectorised Pareto pruning for sets of k-dimensional value vectors.
+
+The vectors are sorted lexicographically (best first), so that a vector can
+only be weakly dominated by vectors that come before it. They are then swept
+in blocks: each block is compared by broadcasting against the non-dominated
+vectors found so far, and against the earlier vectors within the block.
+"""
+
+import numpy as np
+
+
+def pareto_indices(vectors, maximise=True, block_size=256):
+    """
+    Returns the indices of the Pareto-optimal vectors. Of a group of equal
+    vectors only the first one is kept.
+    :param vectors:     a sequence of n vectors of length k, or an n x k array
+    :param maximise:    whether higher values are better (True) or lower
+                        values are better (False)
+    :param block_size:  number of vectors compared at once; bounds the size
+                        of the temporary (block x front x k) arrays
+    :return:            sorted array with the indices of the non-dominated
+                        vectors in the input
+    """
+    values = np.asarray(vectors, dtype=float)
+    if values.shape[0] == 0:
+        return np.empty(0, dtype=int)
+    values = values.reshape((values.shape[0], -1))
+    if maximise:
+        values = -values  # from here on, lower is better
+
+    # lexicographic order on the first objective, then the second, ...;
+    # the sort is stable, so equal vectors keep their input order
+    order = np.lexsort(values.T[::-1])
+    values = values[order]
+
+    front = np.empty((0, values.shape[1]))
+    kept = []
+    for start in range(0, values.shape[0], block_size):
+        block = values[start:start + block_size]
+
+        # weakly dominated by a vector that is already in the front
+        dominated = np.all(front[np.newaxis, :, :] <= block[:, np.newaxis, :],
+                           axis=2).any(axis=1)
+
+        # weakly dominated by an earlier vector of the same block
+        within = np.all(block[:, np.newaxis, :] <= block[np.newaxis, :, :],
+                        axis=2)
+        dominated |= np.triu(within, 1).any(axis=0)
+
+        front = np.vstack((front, block[~dominated]))
+        kept.append(start + np.flatnonzero(~dominated))
+
+    return np.sort(order[np.concatenate(kept)])
+
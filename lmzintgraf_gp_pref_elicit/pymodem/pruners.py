@@ -7,6 +7,7 @@ Created on Mon Aug 22 16:28:51 2016
 """
 
 from .value import ValueVectorSet
+from .dominance import pareto_indices
 from . import value
 import operator
 from functools import reduce
@@ -43,16 +44,12 @@ def pareto_prune(vv_set):
     For Pseudo-code, see e.g., PPrune (Algorithm 2, page 34, Chapter 3) from
         Diederik M. Roijers - Multi-Objective Decision-Theoretic Planning,
         PhD Thesis, University of Amsterdam, 2016.
+    The pairwise comparisons are done in blocks by dominance.pareto_indices.
     """
     result = ValueVectorSet()
     V = vv_set.set
-    while len(V):
-        current_non_dominated = V[0]
-        for i in range(len(V)):
-            if weak_pareto_dominates(V[i], current_non_dominated):
-                current_non_dominated = V[i]
-        result.add(current_non_dominated)
-        V = remove_weak_dominated_by(current_non_dominated, V)
+    if len(V):
+        result.addAll([V[i] for i in pareto_indices(V, maximise=True)])
     return result
 
 
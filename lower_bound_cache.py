@@ -0,0 +1,188 @@
+"""
+Lower-bound cache: Stores the single-objective lower bounds (i.e., single_vi_iter.py) per target node,
+so that repeated inner-loop searches towards the same T do not recompute them.
+Entries are keyed by (graph fingerprint, T, objective), evicted in least-recently-used order
+and optionally backed by .npy files on disk.
+"""
+
+import hashlib
+import numbers
+import os
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+import compact_graph
+import single_vi_iter
+
+
+def graph_fingerprint(G):
+    """
+    Hash of the nodes (in order) and of the numeric edge attributes of a graph
+    :param G: Multi-objective search graph G = (V, E), either a networkx graph or a CompactGraph
+    :return: Hexadecimal fingerprint of the graph
+    """
+    digest = hashlib.sha1()
+    digest.update(repr(list(G.nodes)).encode())
+
+    if isinstance(G, compact_graph.CompactGraph):
+        digest.update(repr((G.objectives, G.directed)).encode())
+        for array in (G.indptr, G.indices, G.costs):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.hexdigest()
+
+    # Numpy scalars (e.g., from geopandas) count as numbers too, hashed as the Python number of the same value,
+    # whose repr doesn't depend on the numpy version
+    for n1, n2, data in G.edges(data=True):
+        costs = sorted((k, v.item() if isinstance(v, np.generic) else v) for k, v in data.items()
+                       if isinstance(v, numbers.Number))
+        digest.update(repr((n1, n2, costs)).encode())
+
+    return digest.hexdigest()
+
+
+def lower_bounds(G, T, objectives, cache=None):
+    """
+    Lower bounds of every node towards T, read from the cache if one is given
+    :param G: Multi-objective search graph G = (V, E), either a networkx graph or a CompactGraph
+    :param T: Terminating (ending) node
+    :param objectives: Objectives
+    :param cache: LowerBoundCache, Landmarks (i.e., landmarks.py), or None to compute the lower bounds from scratch
+    :return: Array of shape (number of nodes, number of objectives), rows follow the order of G.nodes
+    """
+    if cache is not None:
+        return cache.get(G, T, objectives)
+    return single_vi_iter.multi_objective_lower_bounds(G, T, objectives)
+
+
+class FingerprintMemo:
+    """
+    Mixin for the sources of lower bounds (i.e., LowerBoundCache and Landmarks), which are queried with a graph and
+    compute its fingerprint once per graph object. The fingerprints are held in a weak dictionary, so that the graphs
+    can still be freed, which is left out when the object is pickled (e.g., to send a copy to a worker process),
+    as weak references can't be pickled; the fingerprints are then recomputed
+    """
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('fingerprints', None)
+        return state
+
+    def graph_fingerprint(self, G):
+        """
+        Fingerprint of G, computed once per graph object
+        :param G: Multi-objective search graph G = (V, E)
+        :return: Hexadecimal fingerprint of the graph
+        """
+        if 'fingerprints' not in self.__dict__:
+            self.fingerprints = weakref.WeakKeyDictionary()
+        if G not in self.fingerprints:
+            self.fingerprints[G] = graph_fingerprint(G)
+        return self.fingerprints[G]
+
+
+class LowerBoundCache(FingerprintMemo):
+    """
+    LRU cache of lower bounds, keyed by (graph fingerprint, T, objective).
+    The graph is assumed not to change while it is in use, so its fingerprint is computed only once.
+    """
+
+    def __init__(self, max_size=128, cache_dir=None):
+        """
+        :param max_size: Maximum number of (graph, T, objective) entries held in memory
+        :param cache_dir: Directory for the .npy backing files. By default (i.e., cache_dir=None), nothing is written to disk
+        """
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, G, T, objectives):
+        """
+        Lower bounds of every node towards T, computed only for the objectives that are not cached yet
+        :param G: Multi-objective search graph G = (V, E)
+        :param T: Terminating (ending) node
+        :param objectives: Objectives
+        :return: Array of shape (number of nodes, number of objectives), rows follow the order of G.nodes
+        """
+        fingerprint = self.graph_fingerprint(G)
+        columns = {}
+
+        for objective in objectives:
+            key = (fingerprint, T, objective)
+            column = self._lookup(key)
+            if column is not None:
+                columns[objective] = column
+
+        missing = tuple(objective for objective in objectives if objective not in columns)
+        if missing:
+            lower = single_vi_iter.multi_objective_lower_bounds(G, T, missing)
+            for k, objective in enumerate(missing):
+                columns[objective] = lower[:, k].copy()
+                self._store((fingerprint, T, objective), columns[objective])
+
+        return np.column_stack([columns[objective] for objective in objectives])
+
+    def clear(self):
+        """
+        Empties the in-memory part of the cache; files on disk are kept
+        """
+        self.entries.clear()
+
+    def _lookup(self, key):
+        """
+        Looks the key up in memory first and on disk second
+        :param key: (graph fingerprint, T, objective)
+        :return: Lower bounds for a single objective, or None if they have not been computed yet
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)  # Most recently used
+            return self.entries[key]
+
+        path = self._path(key)
+        if path is not None and os.path.exists(path):
+            column = np.load(path)
+            self._remember(key, column)
+            return column
+
+        return None
+
+    def _store(self, key, column):
+        """
+        Adds an entry to memory and, if a cache directory is given, to disk
+        :param key: (graph fingerprint, T, objective)
+        :param column: Lower bounds for a single objective
+        """
+        self._remember(key, column)
+
+        path = self._path(key)
+        if path is not None:
+            np.save(path, column)
+
+    def _remember(self, key, column):
+        """
+        Adds an entry to memory and evicts the least recently used entries
+        :param key: (graph fingerprint, T, objective)
+        :param column: Lower bounds for a single objective
+        """
+        self.entries[key] = column
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)  # Least recently used
+
+    def _path(self, key):
+        """
+        Name of the .npy backing file of an entry
+        :param key: (graph fingerprint, T, objective)
+        :return: Path of the file, or None if the cache is in memory only
+        """
+        if self.cache_dir is None:
+            return None
+
+        fingerprint, T, objective = key
+        name = hashlib.sha1(repr((T, objective)).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{fingerprint}_{name}.npy")
@@ -11,8 +11,13 @@ https://github.com/rradules/POP-following/tree/main
 
 import copy
 import time
+from collections import deque
 import numpy as np
 
+import compact_graph
+from pareto_front import ParetoFront2D
+from lmzintgraf_gp_pref_elicit.pymodem.dominance import pareto_indices
+
 
 def pareto_dominates(a, b):
     """Check if the vector in b Pareto dominates vector a.
@@ -38,87 +43,164 @@ def p_prune(candidates):
         .. [1] Roijers, D. M., & Whiteson, S. (2017). Multi-objective decision making. 34, 129–129.
             https://doi.org/10.2200/S00765ED1V01Y201704AIM034
 
+    Note: The pairwise comparisons are done in blocks by the vectorised pareto_indices of pymodem.
+
     Args:
         candidates (Set[Tuple]): A set of vectors.
 
     Returns:
         Set[Tuple]: A Pareto coverage set.
     """
-    pcs = set()
-    while candidates:
-        vector = candidates.pop()
+    candidates = list(candidates)
+    return {candidates[i] for i in pareto_indices(candidates, maximise=False)}
+
 
-        for alternative in candidates:
-            if pareto_dominates(alternative, vector):
-                vector = alternative
+def _initial_sets(num_nodes, t_index, objectives):
+    """
+    Initial value vectors: (inf, ..., inf) for every node, and (0, ..., 0) for T.
+    With two objectives every set is a ParetoFront2D, otherwise a set of tuples.
+    :param num_nodes: Number of nodes
+    :param t_index: Index of the terminating node T
+    :param objectives: Objectives
+    :return: List with the set of value vectors of each node
+    """
+    infinity = tuple(np.full(len(objectives), np.inf))
+    zero = tuple(0 for _ in objectives)
 
-        to_remove = set(vector)
-        for alternative in candidates:
-            if pareto_dominates(vector, alternative):
-                to_remove.add(alternative)
+    if len(objectives) == 2:
+        nd_vectors = [ParetoFront2D([infinity]) for _ in range(num_nodes)]
+        nd_vectors[t_index] = ParetoFront2D([zero])
+    else:
+        nd_vectors = [{infinity} for _ in range(num_nodes)]
+        nd_vectors[t_index] = {zero}
 
-        candidates -= to_remove
-        pcs.add(vector)
-    return pcs
+    return nd_vectors
+
+
+def _backup(n, adjacency, nd_vectors):
+    """
+    Prune(V_n \cup {\bigcup}_{n' \in N_G(n)} c(n,n') + V_{n'})
+    :param n: Node index
+    :param adjacency: For each node index, the (neighbor index, cost vector) of every arc leaving it
+    :param nd_vectors: List with the set of value vectors of each node
+    :return: New set of value vectors of n
+    """
+    if isinstance(nd_vectors[n], ParetoFront2D):
+        results = nd_vectors[n].copy()
+        for nk, cost in adjacency[n]:
+            results.merge(nd_vectors[nk].translate(cost))  # Pruned while merging
+        return results
+
+    results = nd_vectors[n].copy()
+
+    for nk, cost in adjacency[n]:
+        for value_vec in nd_vectors[nk]:
+            results.add(tuple(c + v for c, v in zip(cost, value_vec)))  # The set of candidate vectors
+
+    return p_prune(results)  # Pareto pruning, once for the candidates of all neighbors
 
 
 def pvi(G, T, objectives):
     """
     Pareto Value Iteration, a.k.a. Multi-Objective Value Iteration
-    :param G: Multi-objective search graph G = (V, E)
+    :param G: Multi-objective search graph G = (V, E), either a networkx graph or a CompactGraph
     :param T: Terminating (ending) node
     :param objectives: Objectives
     :return: The set of value vectors for each node
     """
 
     start = time.time()  # Timer
-    nd_vectors = [set([tuple(np.full(2, np.inf)) for _ in range(len(G.nodes))]) for _ in range(len(G.nodes))]  # Initialisation of nodes
-    j = 0  # Counter for iterations
 
-    for n, current_node in enumerate(G.nodes):
-        if current_node == T:  # We've reached the terminal state
-            nd_vectors[n] = set([(0, 0) for _ in G.nodes])  # The set of value vectors for T is always (0,0)
-            break
+    # Adjacency index, built once: for each node index, the (neighbor index, cost vector) of every arc leaving it
+    graph = compact_graph.as_compact(G, objectives)
+    indptr, indices = graph.indptr.tolist(), graph.indices.tolist()
+    costs = [tuple(c) for c in graph.objective_costs(objectives).tolist()]
+    adjacency = [[(indices[e], costs[e]) for e in range(indptr[n], indptr[n + 1])] for n in range(len(graph))]
+
+    t_index = graph.index(T)  # We've reached the terminal state, the set of value vectors for T is always (0,0)
+    nd_vectors = _initial_sets(len(graph), t_index, objectives)  # Initialisation of nodes
+    j = 0  # Counter for iterations
 
     while True:  # Run until convergence
         old_vectors = copy.deepcopy(nd_vectors)
 
-        for n, current_node in enumerate(G.nodes):
-            if current_node == T:
+        for n in range(len(graph)):
+            if n == t_index:
                 continue
 
-            for nk, neighbor in enumerate(G.nodes):
-                if neighbor not in G.neighbors(current_node):
-                    continue
+            nd_vectors[n] = _backup(n, adjacency, nd_vectors)
 
-                edge = G[current_node][neighbor]
-                edge_list = [v for k, v in edge.items()]  # Stores only the values of the edges' properties
+        j += 1
 
-                cost = []
-                for i in objectives:
-                    cost.append(edge_list[0][i])
+        if nd_vectors == old_vectors:  # Check for convergence
+            break
 
-                cost = np.array(cost)
-                results = nd_vectors[n].copy()
+        nd_vectors = copy.deepcopy(nd_vectors)  # Else perform a deep copy and go again
+
+    print(f'Iterations: {j}')
+    end = time.time()
+    elapsed_seconds = (end - start)
+    print("Seconds elapsed: " + str(elapsed_seconds))
+
+    return [set(vectors) for vectors in nd_vectors]
 
-                for value_vec in nd_vectors[nk]:
-                    results.add(tuple(cost+value_vec))  # The set of candidate vectors
 
-                results = p_prune(results)  # Pareto pruning
+def async_pvi(G, T, objectives):
+    """
+    Asynchronous (worklist-driven) Pareto Value Iteration.
+    Instead of sweeping over all nodes until nothing changes, a node is only processed again when the set of
+    value vectors of one of its successors changed. The algorithm has converged when the worklist is empty.
+    :param G: Multi-objective search graph G = (V, E), either a networkx graph or a CompactGraph
+    :param T: Terminating (ending) node
+    :param objectives: Objectives
+    :return: The set of value vectors for each node
+    """
 
-                nd_vectors[n] = results
+    start = time.time()  # Timer
 
+    # Adjacency index for the update of a node, and the reversed index for finding the nodes that depend on it
+    graph = compact_graph.as_compact(G, objectives)
+    indptr, indices = graph.indptr.tolist(), graph.indices.tolist()
+    costs = [tuple(c) for c in graph.objective_costs(objectives).tolist()]
+    adjacency = [[(indices[e], costs[e]) for e in range(indptr[n], indptr[n + 1])] for n in range(len(graph))]
+
+    reverse = graph.reverse()
+    reverse_indptr, reverse_indices = reverse.indptr.tolist(), reverse.indices.tolist()
+
+    t_index = graph.index(T)  # We've reached the terminal state, the set of value vectors for T is always (0,0)
+    nd_vectors = _initial_sets(len(graph), t_index, objectives)  # Initialisation of nodes
+    j = 0  # Counter for node updates
+
+    # Worklist, starting with the nodes that can move to T
+    queued = [False] * len(graph)
+    worklist = deque()
+    for e in range(reverse_indptr[t_index], reverse_indptr[t_index + 1]):
+        n = reverse_indices[e]
+        if n != t_index and not queued[n]:
+            queued[n] = True
+            worklist.append(n)
+
+    while worklist:  # Run until convergence
+        n = worklist.popleft()
+        queued[n] = False
         j += 1
 
-        if nd_vectors == old_vectors:  # Check for convergence
-            break
+        results = _backup(n, adjacency, nd_vectors)
 
-        nd_vectors = copy.deepcopy(nd_vectors)  # Else perform a deep copy and go again
+        if results == nd_vectors[n]:
+            continue
+        nd_vectors[n] = results
 
-    print(f'Iterations: {j}')
+        # The set of n changed, so the nodes that can move to n have to be updated again
+        for e in range(reverse_indptr[n], reverse_indptr[n + 1]):
+            predecessor = reverse_indices[e]
+            if predecessor != t_index and not queued[predecessor]:
+                queued[predecessor] = True
+                worklist.append(predecessor)
+
+    print(f'Node updates: {j}')
     end = time.time()
     elapsed_seconds = (end - start)
     print("Seconds elapsed: " + str(elapsed_seconds))
 
-    return nd_vectors
-
+    return [set(vectors) for vectors in nd_vectors]
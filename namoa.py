@@ -0,0 +1,137 @@
+"""
+Label-setting multi-objective search: Computes the exact Pareto set of S-T paths, with their node sequences,
+for a single query. Cost labels are expanded in lexicographic order of their estimated total cost
+and pruned with the Pareto set of labels at each node. With the lower bounds from the
+single-objective value iteration (i.e., single_vi_iter.py) as heuristic this is NAMOA*,
+without a heuristic it is Martins' algorithm.
+
+Mandow, L., & Pérez de la Cruz, J. L. (2010). Multiobjective A* search with consistent heuristics.
+Journal of the ACM, 57(5), 1-25.
+"""
+
+import heapq
+import time
+
+import numpy as np
+
+import compact_graph
+import lower_bound_cache
+
+
+def _weakly_dominates(a, b):
+    """
+    Check if cost vector a is at least as good as cost vector b in every objective (minimization)
+    :param a: Cost vector (tuple)
+    :param b: Cost vector (tuple)
+    :return: Whether a weakly dominates b
+    """
+    for x, y in zip(a, b):
+        if x > y:
+            return False
+    return True
+
+
+def namoa(G, S, T, objectives, heuristic=True, cache=None):
+    """
+    Finds all Pareto-optimal paths from S to T
+    :param G: Multi-objective search graph G = (V, E), either a networkx graph or a CompactGraph
+    :param S: Starting node
+    :param T: Terminating (ending) node
+    :param objectives: Objectives
+    :param heuristic: Whether to guide the search with the single-objective lower bounds towards T (NAMOA*).
+    With heuristic=False every lower bound is 0 (Martins' algorithm)
+    :param cache: LowerBoundCache (i.e., lower_bound_cache.py) to reuse the lower bounds towards T,
+    or Landmarks (i.e., landmarks.py)
+    :return: List of (path, cost) with one path for each Pareto-optimal cost vector, in lexicographic order of cost
+    """
+    start = time.time()
+
+    graph = compact_graph.as_compact(G, objectives)
+    indptr = graph.indptr.tolist()
+    indices = graph.indices.tolist()
+    costs = [tuple(c) for c in graph.objective_costs(objectives).tolist()]
+    s_index, t_index = graph.index(S), graph.index(T)
+
+    if heuristic:
+        lower = lower_bound_cache.lower_bounds(graph, T, objectives, cache)
+    else:
+        lower = np.zeros((len(graph), len(objectives)))
+    lower = [tuple(h) for h in lower.tolist()]
+
+    # Label arena: node, cost so far, parent label and whether the label is still open and non-dominated
+    label_node = [s_index]
+    label_cost = [tuple(0.0 for _ in objectives)]
+    label_parent = [-1]
+    label_alive = [True]
+
+    open_labels = [[] for _ in range(len(graph))]  # Per node, labels waiting in the queue
+    closed_costs = [[] for _ in range(len(graph))]  # Per node, cost vectors of expanded labels
+    open_labels[s_index].append(0)
+
+    heap = [(lower[s_index], 0)]  # (estimated total cost, label), popped in lexicographic order
+    solutions = []  # Labels that reached T
+    expansions = 0
+
+    while heap:
+        estimate, label = heapq.heappop(heap)
+        if not label_alive[label]:  # Removed after a dominating label reached the same node
+            continue
+
+        node, cost = label_node[label], label_cost[label]
+        open_labels[node].remove(label)
+        label_alive[label] = False
+
+        # Filtering: the label can't lead to a new Pareto-optimal cost vector
+        if any(_weakly_dominates(label_cost[s], estimate) for s in solutions):
+            continue
+
+        if node == t_index:
+            solutions.append(label)
+            continue
+
+        closed_costs[node].append(cost)
+        expansions += 1
+
+        for e in range(indptr[node], indptr[node + 1]):
+            neighbor = indices[e]
+            new_cost = tuple(a + b for a, b in zip(cost, costs[e]))
+            new_estimate = tuple(a + b for a, b in zip(new_cost, lower[neighbor]))
+
+            if any(_weakly_dominates(label_cost[s], new_estimate) for s in solutions):
+                continue
+
+            # Pruning with the Pareto set of labels at the neighbor
+            if any(_weakly_dominates(c, new_cost) for c in closed_costs[neighbor]):
+                continue
+            if any(_weakly_dominates(label_cost[o], new_cost) for o in open_labels[neighbor]):
+                continue
+
+            for o in [o for o in open_labels[neighbor] if _weakly_dominates(new_cost, label_cost[o])]:
+                open_labels[neighbor].remove(o)
+                label_alive[o] = False
+
+            label_node.append(neighbor)
+            label_cost.append(new_cost)
+            label_parent.append(label)
+            label_alive.append(True)
+
+            new_label = len(label_node) - 1
+            open_labels[neighbor].append(new_label)
+            heapq.heappush(heap, (new_estimate, new_label))
+
+    # Rebuild the paths by following the parent labels back to S
+    pareto_set = []
+    for label in solutions:
+        cost = np.array(label_cost[label])
+        path = []
+        while label != -1:
+            path.append(label_node[label])
+            label = label_parent[label]
+        pareto_set.append((graph.path_to_nodes(path[::-1]), cost))
+
+    print(f'Label expansions: {expansions}')
+    end = time.time()
+    elapsed_seconds = (end - start)
+    print("Label-setting time elapsed in seconds: " + str(elapsed_seconds))
+
+    return pareto_set
@@ -11,125 +11,464 @@ https://github.com/lmzintgraf/gp_pref_elicit
 import numpy as np
 import networkx as nx
 import time
+from concurrent.futures import ProcessPoolExecutor
 
+import best_first_lower
+import compact_graph
 import dfs_lower
+import lower_bound_cache
 
 from lmzintgraf_gp_pref_elicit import dataset, gaussian_process, acquisition_function
 from lmzintgraf_gp_pref_elicit.gp_utilities import utils_user as utils_user
 
+# Inner-loop engines that can be selected in outer()
+INNER_LOOPS = {
+    'dfs': dfs_lower.dfs_lower,  # Depth-first search
+    'best_first': best_first_lower.best_first_lower,  # Best-first (A*-style) search
+}
 
-def outer(G, S, T, d):
+_worker = {}  # Graph and lower-bound cache of an inner-loop worker process
+
+
+def _init_worker(graph, graph_store, cache):
     """
-    Selects the target direction
-    :param G: Multi-objective search graph G = (V, E)
-    :param S: Starting node
-    :param T: Terminating (ending) node
-    :param d: Objectives
-    :return Target t; Recommended path p and its value (cost) v_p
+    Initialises a worker process for the parallel inner-loop searches
+    :param graph: CompactGraph, or None to open the memory-mapped graph store instead
+    :param graph_store: Directory of a graph store written by CompactGraph.write_mmap(), shared by all workers
+    :param cache: LowerBoundCache or Landmarks of the session, copied into the worker
     """
+    _worker['graph'] = compact_graph.CompactGraph.open_mmap(graph_store) if graph is None else graph
+    _worker['cache'] = cache
 
-    start = time.time()
 
-    # Initialise the Gaussian process for 2 objectives
-    gp = gaussian_process.GPPairwise(num_objectives=2, std_noise=0.01, kernel_width=0.15, prior_mean_type='zero', seed=123)
+def _inner_search(inner, S, T, t, U, objectives, inner_options):
+    """
+    Runs an inner-loop search in a worker process
+    :return: Same as the inner loop: path; updated upper bounds; whether the path is proven optimal
+    """
+    return INNER_LOOPS[inner](_worker['graph'], S, T, t, U, max_iter=None, objectives=objectives,
+                              cache=_worker['cache'], **inner_options)
 
-    P = []  # Pareto set
-    val_p = []  # value vectors w.r.t. p, i.e., v^{p_1}, v^{p_2}
-    val_vector_p_star = []  # value vectors w.r.t. p^*
-    val_p_t = [] # value vectors w.r.t. p^t from DFS
 
-    # Path initialisation
-    for i in d:
-        p = nx.shortest_path(G, source=S, target=T, weight=i, method='dijkstra')  # Dijkstra's algorithm
-        P.append(p)
+def _pack_paths(graph, paths):
+    """
+    :param graph: CompactGraph
+    :param paths: List of paths, each a sequence of node labels
+    :return: Node ids of all paths one after another; Offset of each path in the node ids (plus the end of the last one)
+    """
+    nodes = np.array([graph.index(n) for p in paths for n in p], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum([len(p) for p in paths]))).astype(np.int64)
+    return nodes, offsets
 
-        # Computes the total cost associated with the path and objective, i.e., the value of the path
-        val_obj1 = nx.path_weight(G, path=p, weight='length')
-        val_obj2 = nx.path_weight(G, path=p, weight='crossing')
-        val_p.append(np.array([val_obj1, val_obj2]))
 
-    # Candidate Targets, i.e., the most optimistic points
-    C = [min(val_p[0][0], val_p[1][0]), min(val_p[0][1], val_p[1][1])]
-    C_array = [np.array(C)]
+def _unpack_paths(graph, nodes, offsets):
+    """
+    Inverse of _pack_paths
+    :return: List of paths, each a list of node labels
+    """
+    labels = graph.nodes
+    nodes = nodes.tolist()
+    return [[labels[i] for i in nodes[a:b]] for a, b in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
 
-    # The most pessimistic points form the upper bounds
-    U = [max(val_p[0][0], val_p[1][0]), max(val_p[0][1], val_p[1][1])]
 
-    # User ranking: Compare paths in P
-    user_preference = utils_user.UserPreference(num_objectives=2, std_noise=0.1, seed=123)  # seed=123
-    add_noise = True
-    ground_utility = user_preference.get_preference(val_p, add_noise=add_noise)  # This is the ground-truth utility, i.e., the true utility
-    # print(f"Ground-truth utility for paths in P: {np.max(ground_utility)}")
+def _pack_object(obj, prefix):
+    """
+    Attributes of a Gaussian process, dataset or acquirer as arrays, for ElicitationSession.serialize()
+    :param obj: Object whose attributes are arrays, numbers, strings, random states or None
+    :param prefix: Prefix of the keys
+    :return: Dictionary {prefix + attribute: array}, attributes that are None are left out
+    """
+    state = {}
+    for name, value in vars(obj).items():
+        if value is None:
+            continue
+        if isinstance(value, np.random.RandomState):
+            _, keys, pos, has_gauss, cached_gaussian = value.get_state()
+            state[prefix + name + ':keys'] = keys
+            state[prefix + name + ':pos'] = np.array([pos, has_gauss, cached_gaussian])
+        else:
+            state[prefix + name] = np.asarray(value)
+    return state
+
+
+def _unpack_object(obj, state, prefix):
+    """
+    Inverse of _pack_object: sets the attributes of obj, which was created with the same parameters
+    :return: obj
+    """
+    for key in state.keys():
+        if not key.startswith(prefix) or key.endswith(':pos'):
+            continue
+        name = key[len(prefix):]
+        if name.endswith(':keys'):
+            name = name[:-len(':keys')]
+            pos, has_gauss, cached_gaussian = state[prefix + name + ':pos'].tolist()
+            random_state = np.random.RandomState()
+            random_state.set_state(('MT19937', state[key], int(pos), int(has_gauss), cached_gaussian))
+            setattr(obj, name, random_state)
+        else:
+            value = state[key]
+            setattr(obj, name, value.item() if value.ndim == 0 else value)
+    return obj
+
+
+class ElicitationSession:
+    """
+    State of the outer loop for one user, advanced one answer at a time:
+    next_query() runs the inner-loop searches up to the next pair of paths the user has to compare,
+    and submit_answer() adds the user's choice to the Gaussian process.
+    The state can be written to a dictionary of arrays with serialize() and read back with restore(),
+    so that a session can wait for an answer without holding on to the graph, a process or a thread.
+    """
+
+    def __init__(self, G, S, T, d, cache=None, inner='dfs', inner_options=None, hierarchies=None, workers=1,
+                 graph_store=None):
+        """
+        Finds the initial paths; the first query compares them.
+        The parameters are those of outer()
+        """
+        self._attach(G, d, cache, inner, inner_options, workers, graph_store)
+        self.S, self.T = S, T
+
+        # Initialise the Gaussian process for 2 objectives
+        self.gp = gaussian_process.GPPairwise(num_objectives=2, std_noise=0.01, kernel_width=0.15, prior_mean_type='zero', seed=123)
+        self.comparisons = dataset.DatasetPairwise(num_objectives=2)
+        self.acq_fun = None  # Initialised once the first answer is in
+
+        self.P = []  # Pareto set
+        self.val_p = []  # value vectors w.r.t. p, i.e., v^{p_1}, v^{p_2}
+        self.val_P = []  # value vectors of all paths in P, in the same order
+        self.val_vector_p_star = []  # value vectors w.r.t. p^*, one per change of p^*; the last is the current p^*
+        self.val_p_t = None  # value vector w.r.t. the latest p^t from the inner loop
+        self.p_star_index = None  # p^* is P[p_star_index]
+
+        # Path initialisation, with networkx's Dijkstra's algorithm on a networkx view of G if there are no hierarchies
+        if hierarchies is None and isinstance(G, compact_graph.CompactGraph):
+            G = G.to_networkx()
+        for i in d:
+            if hierarchies is not None:
+                p, val = hierarchies[i].query(S, T)  # Contraction hierarchy query, val is the cost for each objective in d
+                self.P.append(p)
+                self.val_p.append(val)
+                continue
+
+            p = nx.shortest_path(G, source=S, target=T, weight=i, method='dijkstra')  # Dijkstra's algorithm
+            self.P.append(p)
+
+            # Computes the total cost associated with the path and objective, i.e., the value of the path
+            val_obj1 = nx.path_weight(G, path=p, weight='length')
+            val_obj2 = nx.path_weight(G, path=p, weight='crossing')
+            self.val_p.append(np.array([val_obj1, val_obj2]))
+        self.val_P = [val.copy() for val in self.val_p]
+
+        # Candidate Targets, i.e., the most optimistic points
+        self.C = [np.minimum(self.val_p[0], self.val_p[1])]
+        self.C_array = [self.C[0].copy()]  # Candidate targets that are still to be searched
+        self.t = self.C[0]
+
+        # The most pessimistic points form the upper bounds
+        self.U = np.maximum(self.val_p[0], self.val_p[1])
+
+        # Inner-loop results of the current targets that are not processed yet: (t, p_t, new_U, optimal)
+        self.results = []
+
+        # 'initial': the initial paths are to be compared; 'search': the inner loop runs next;
+        # 'answer': p^t is to be compared to p^*; 'done': no candidate targets are left
+        self.state = 'initial'
+
+        # Both paths have the same value, which is then the only Pareto-optimal value: there is nothing to elicit.
+        # Asking the user would add a comparison of a value with itself, which the dataset drops, and the GP update
+        # would then fail on an empty dataset. This happens often with contraction hierarchies, whose lexicographic
+        # tie-breaks make the shortest path for each objective also the best in the other objectives whenever possible
+        if np.all(self.val_p[0] == self.val_p[1]):
+            print("The initial paths have the same value, so it is optimal for any user")
+            self.p_star_index = 0
+            self.val_vector_p_star.append(self.val_p[0].copy())
+            self.state = 'done'
+
+    def _attach(self, G, d, cache, inner, inner_options, workers, graph_store):
+        """
+        Sets the parts of the session that are not part of its state
+        """
+        self.d = tuple(d)
+        self.inner = inner
+        self.inner_options = {} if inner_options is None else inner_options
+        self.cache = lower_bound_cache.LowerBoundCache() if cache is None else cache
+        self.workers = workers
+        self.graph_store = graph_store
+        self.pool = None
 
-    # Add the comparisons to the GP
-    comparisons = dataset.DatasetPairwise(num_objectives=2)
-    comparisons.add_single_comparison(val_p[np.argmax(ground_utility)], val_p[np.argmin(ground_utility)])  # This is user ranking of their preferences
-    gp.update(comparisons)
+        # Array-based view of G for the inner loop, built once per session
+        self.graph = compact_graph.as_compact(G, d)
 
-    # Find the path the user likes best and has the maximum a posteriori (MAP) estimate
-    u_v, _ = gp.get_predictive_params(val_p, True)  # The maximum a posteriori (MAP) estimate is the mean from gaussian_process.get_predictive_params()
-    p_star_index = np.argmax(u_v)
-    p_star = P[p_star_index]
+    @property
+    def p_star(self):
+        """
+        :return: Recommended path p^*, None before the first answer
+        """
+        return None if self.p_star_index is None else self.P[self.p_star_index]
 
-    # Computes the total cost associated with the path and objective, i.e., the value of the path
-    val_p_star1 = nx.path_weight(G, path=p_star, weight='length')
-    val_p_star2 = nx.path_weight(G, path=p_star, weight='crossing')
-    val_vector_p_star.append(np.array([val_p_star1, val_p_star2]))
+    def next_query(self):
+        """
+        Runs the inner loop on the candidate targets until a path is found that improves in its target region
+        :return: None if the session is done. Otherwise the query {'paths': [path 0, path 1], 'values': [value 0, value 1]},
+        with the new path p^t and p^* as paths 0 and 1 (or the two initial paths for the first query)
+        """
+        if self.state == 'initial':
+            return {'paths': self.P[:2], 'values': self.val_p[:2]}
+        if self.state == 'answer':
+            return {'paths': [self.P[-1], self.p_star], 'values': [self.val_p_t, self.val_vector_p_star[-1]]}
 
-    # Initialise the acquisition function
-    input_domain = np.array(C_array)  # set of Candidate targets
-    acq_fun = acquisition_function.DiscreteAcquirer(input_domain=input_domain, query_type='ranking', seed=123, acquisition_type='expected improvement')
+        while self.state == 'search':
+            if not self.results:
+                if len(self.C_array) == 0:
+                    self.state = 'done'
+                    self.close()
+                    break
+                self.results = self._search()
 
-    while len(C_array) != 0:
+            t, p_t, new_U, optimal = self.results.pop(0)
+            self.t = t
+            if not optimal:
+                print("Inner loop stopped early; the path is not proven optimal for the target region")
+
+            # If v^p_t improves in the target region and is not the value of a path in P yet
+            # (U is the same for all targets, so several targets can lead to the same value)
+            if np.any(np.less(new_U, self.U)) and not any(np.array_equal(new_U, val) for val in self.val_P):
+                self.P.append(p_t)
+                self.val_P.append(np.array(new_U))
+                self.val_p_t = np.array(new_U)
+                self.state = 'answer'
+                return self.next_query()
+
+        return None
+
+    def _search(self):
+        """
+        Runs the inner loop for the candidate target with the highest expected improvement (the top-k with k workers)
+        :return: List of (t, p_t, new_U, optimal) in the order of the targets
+        """
         # Pick the Candidate target which has the highest value from the acquisition function
-        expected_improvement = acquisition_function.get_expected_improvement(input_domain, gp, acq_fun.history)
-        t_index = np.argmax(expected_improvement)
-        t = input_domain[t_index]
+        input_domain = self.acq_fun.input_domain
+        expected_improvement = acquisition_function.get_expected_improvement(input_domain, self.gp, self.acq_fun.history)
+        if self.workers == 1:
+            targets = [input_domain[np.argmax(expected_improvement)]]
+        else:
+            targets = input_domain[np.argsort(-expected_improvement, kind='stable')[:self.workers]]
+
+        # Remove the targets from C
+        for t in targets:
+            self.C_array = [x for x in self.C_array if not np.all(x == t)]
+        self._update_input_domain()
+
+        # Inner-loop approach (DFS by default) guided by the lower-bounds computed from the single-objective value iteration
+        # With a time_budget in inner_options, p_t is the best path found within the budget (optimal=False if cut short)
+        if self.workers == 1:
+            results = [INNER_LOOPS[self.inner](self.graph, self.S, self.T, targets[0], self.U.copy(), max_iter=None,
+                                               objectives=self.d, cache=self.cache, **self.inner_options)]  # Change max_iter when doing experiments
+        else:
+            # Worker processes for the parallel inner-loop searches, which read the graph but never change it
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                initargs=(self.graph if self.graph_store is None else None,
+                                                          self.graph_store, self.cache))
 
-        # Remove t from C
-        indices = [i for i, x in enumerate(C_array) if np.all(x == t)]
-        for index in sorted(indices, reverse=True):
-            del C_array[index]
+            # All targets are searched at the same time against the same U, so the results can't prune each other;
+            # they are merged in the order of the targets, skipping the values that an earlier result already added to P
+            futures = [self.pool.submit(_inner_search, self.inner, self.S, self.T, t, self.U.copy(), self.d,
+                                        self.inner_options) for t in targets]
+            results = [future.result() for future in futures]
 
-        # Inner-loop approach with DFS guided by the lower-bounds computed from the single-objective value iteration
-        p_t, new_U = dfs_lower.dfs_lower(G, S, T, t, U, max_iter=None)  # Change max_iter when doing experiments
+        return [(t, p_t, np.asarray(new_U, dtype=float), optimal) for t, (p_t, new_U, optimal) in zip(targets, results)]
 
-        val_p_t.append(new_U)
-        U = [np.array(U)]
+    def submit_answer(self, preferred):
+        """
+        Adds the user's answer to the current query to the Gaussian process and updates p^*
+        :param preferred: Index (0 or 1) of the path the user prefers in the query
+        """
+        if self.state not in ('initial', 'answer'):
+            raise RuntimeError("There is no query to answer")
+        if preferred not in (0, 1):
+            raise ValueError("The answer has to be 0 or 1")
 
-        # If v^p_t improves in the target region
-        if np.any(np.less(val_p_t, U)):
-            P.append(p_t)
+        # Add the comparisons to the GP
+        values = self.next_query()['values']
+        self.comparisons.add_single_comparison(values[preferred], values[1 - preferred])  # This is user ranking of their preferences
+        self.gp.update(self.comparisons, incremental=True)  # Newton-Raphson starts from the MAP estimate of the previous answer
 
-            # Compare p^t to p^∗ and add comparison to the GP ▷ User ranking, i.e., is the new path preferred to the current, maximum one?
-            val_p_t = [np.array(new_U)]
-            compare_pt_pstar = val_p_t.copy()
-            compare_pt_pstar.extend(val_vector_p_star)
-            ranking_new_paths = user_preference.get_preference(compare_pt_pstar, add_noise=add_noise)
-            p_star_utility = np.max(ranking_new_paths)
-            print(f"Utility for p*: {p_star_utility}")
+        if self.state == 'initial':
+            # Find the path the user likes best and has the maximum a posteriori (MAP) estimate
+            u_v, _ = self.gp.get_predictive_params(self.val_p, True)  # The maximum a posteriori (MAP) estimate is the mean from gaussian_process.get_predictive_params()
+            self.p_star_index = int(np.argmax(u_v))
 
-            # Add the comparisons to the GP
-            comparisons.add_single_comparison(compare_pt_pstar[np.argmax(ranking_new_paths)], compare_pt_pstar[np.argmin(ranking_new_paths)])
-            gp.update(comparisons)
+            # p* is one of the paths in P, whose values are already known
+            self.val_vector_p_star.append(self.val_p[self.p_star_index].copy())
 
+            # Initialise the acquisition function
+            input_domain = np.array(self.C_array)  # set of Candidate targets
+            self.acq_fun = acquisition_function.DiscreteAcquirer(input_domain=input_domain, query_type='ranking', seed=123, acquisition_type='expected improvement')
+
+        else:
             # if u(v^{p^t}) > u(v^{p^*}) then
-            u_v_p_t, _ = gp.get_predictive_params(val_p_t, True)  # The maximum a posteriori (MAP) estimate is the mean from gaussian_process.get_predictive_params()
-            u_v_p_star, _ = gp.get_predictive_params(val_vector_p_star, True)
+            u_v_p_t, _ = self.gp.get_predictive_params([self.val_p_t], True)  # The maximum a posteriori (MAP) estimate is the mean from gaussian_process.get_predictive_params()
+            u_v_p_star, _ = self.gp.get_predictive_params(self.val_vector_p_star[-1:], True)
 
             if u_v_p_t > u_v_p_star:
-                # p^∗ ← p^t
-                p_star = p_t
+                # p^∗ ← p^t, along with its value vector
+                self.p_star_index = len(self.P) - 1
+                self.val_vector_p_star.append(self.val_p_t.copy())
+
+            # Compute new candidate targets based on v^{p^t} and add to C,
+            # and to the targets still to be searched unless they were candidates before
+            for c in (np.minimum(self.val_p_t, self.val_p[0]), np.minimum(self.val_p_t, self.val_p[1])):
+                if not any(np.array_equal(c, x) for x in self.C):
+                    self.C.append(c)
+                    self.C_array.append(c.copy())
+            self._update_input_domain()
+
+        self.state = 'search'
+
+    def _update_input_domain(self):
+        """
+        The acquisition function picks the next targets among the candidate targets that are still to be searched
+        """
+        self.acq_fun.input_domain = np.array(self.C_array).reshape((-1, len(self.d)))
+
+    @property
+    def done(self):
+        return self.state == 'done'
+
+    def close(self):
+        """
+        Shuts down the worker processes of the session, if any
+        """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # The worker processes are shut down even if the inner loop or the GP update raised
+        self.close()
+
+    def serialize(self):
+        """
+        The full state of the session as arrays; the graph, lower-bound cache and worker processes are not part of it
+        :return: Dictionary of arrays, e.g., for np.savez
+        """
+        k = len(self.d)
+        state = {
+            'objectives': np.array(self.d), 'inner': np.array(self.inner), 'state': np.array(self.state),
+            'S': np.array(self.graph.index(self.S)), 'T': np.array(self.graph.index(self.T)),
+            'val_p': np.array(self.val_p), 'val_P': np.array(self.val_P), 'val_vector_p_star': np.array(self.val_vector_p_star).reshape((-1, k)),
+            'val_p_t': np.empty(0) if self.val_p_t is None else self.val_p_t,
+            'p_star_index': np.array(-1 if self.p_star_index is None else self.p_star_index),
+            'C': np.array(self.C).reshape((-1, k)), 'C_array': np.array(self.C_array).reshape((-1, k)),
+            'U': self.U, 't': np.asarray(self.t),
+            'results_t': np.array([r[0] for r in self.results]).reshape((-1, k)),
+            'results_U': np.array([r[2] for r in self.results]).reshape((-1, k)),
+            'results_optimal': np.array([r[3] for r in self.results], dtype=bool),
+        }
+        state['P_nodes'], state['P_offsets'] = _pack_paths(self.graph, self.P)
+        state['results_nodes'], state['results_offsets'] = _pack_paths(self.graph, [r[1] for r in self.results])
+
+        state.update(_pack_object(self.gp, 'gp.'))
+        state.update(_pack_object(self.comparisons, 'comparisons.'))
+        if self.acq_fun is not None:
+            state.update(_pack_object(self.acq_fun, 'acq_fun.'))
+        return state
+
+    @classmethod
+    def restore(cls, state, G, cache=None, inner_options=None, workers=1, graph_store=None):
+        """
+        Reads a session written by serialize()
+        :param state: Dictionary of arrays from serialize(), or the NpzFile it was saved to
+        :param G: The graph of the session, preferably a CompactGraph
+        The other parameters are those of outer(); inner_options are not part of the state, as they may hold callbacks
+        :return: ElicitationSession
+        """
+        session = cls.__new__(cls)
+        session._attach(G, state['objectives'].tolist(), cache, state['inner'].item(), inner_options, workers, graph_store)
+        graph = session.graph
+
+        session.state = state['state'].item()
+        session.S, session.T = graph.nodes[int(state['S'])], graph.nodes[int(state['T'])]
+        session.P = _unpack_paths(graph, state['P_nodes'], state['P_offsets'])
+        session.val_p, session.val_P = list(state['val_p']), list(state['val_P'])
+        session.val_vector_p_star = list(state['val_vector_p_star'])
+        session.val_p_t = state['val_p_t'] if state['val_p_t'].size else None
+        session.p_star_index = None if int(state['p_star_index']) < 0 else int(state['p_star_index'])
+        session.C, session.C_array = list(state['C']), list(state['C_array'])
+        session.U, session.t = state['U'], state['t']
+
+        paths = _unpack_paths(graph, state['results_nodes'], state['results_offsets'])
+        session.results = list(zip(state['results_t'], paths, state['results_U'], state['results_optimal'].tolist()))
+
+        session.gp = _unpack_object(gaussian_process.GPPairwise(num_objectives=2), state, 'gp.')
+        session.comparisons = _unpack_object(dataset.DatasetPairwise(num_objectives=2), state, 'comparisons.')
+        session.acq_fun = None
+        if 'acq_fun.input_domain' in state:
+            session.acq_fun = _unpack_object(acquisition_function.DiscreteAcquirer(
+                input_domain=state['acq_fun.input_domain'], query_type='ranking', seed=123), state, 'acq_fun.')
+        return session
 
-            # Compute new candidate targets based on v^{p^t} and add to C
-            new_C1 = [min(val_p_t[0][0], val_p[0][0]), min(val_p_t[0][1], val_p[0][1])]
-            C.append(new_C1)
-            new_C2 = [min(val_p_t[0][0], val_p[1][0]), min(val_p_t[0][1], val_p[1][1])]
-            C.append(new_C2)
+
+def outer(G, S, T, d, cache=None, inner='dfs', inner_options=None, hierarchies=None, workers=1, graph_store=None):
+    """
+    Selects the target direction, answering the queries of the session with a simulated user
+    :param G: Multi-objective search graph G = (V, E), either a networkx graph or a CompactGraph (preferred, no conversion)
+    :param S: Starting node
+    :param T: Terminating (ending) node
+    :param d: Objectives
+    :param cache: LowerBoundCache shared by the inner-loop searches. By default (i.e., cache=None), a new in-memory
+    cache is used for this session; pass one in to also reuse the lower bounds across sessions,
+    or pass Landmarks (i.e., landmarks.py) precomputed for G to skip the single-objective value iteration for T
+    :param inner: Inner-loop engine, one of INNER_LOOPS: 'dfs' (default) or 'best_first'
+    :param inner_options: Extra keyword arguments for the inner loop, e.g., {'anytime': True} for 'best_first',
+    or {'time_budget': 50, 'on_improve': callback} to bound the latency of each inner-loop search (in milliseconds)
+    :param hierarchies: Contraction hierarchies {objective: ContractionHierarchy} (i.e., contraction_hierarchy.py)
+    built beforehand for G and d, to find the initial paths without a Dijkstra search over the whole map.
+    By default (i.e., hierarchies=None), networkx's Dijkstra's algorithm is used
+    :param workers: Number of candidate targets searched at the same time, each in its own process.
+    By default (i.e., workers=1), the target with the highest expected improvement is searched in this process.
+    With workers=k, the top-k targets are searched in parallel and their paths are added in order of expected improvement,
+    leaving out those whose value is already in P
+    (inner_options then have to be picklable, i.e., no on_improve callback).
+    Limitation: all k searches of a round start from the same upper bounds U, so a path found for one target does not
+    prune the searches for the others, and the order of the results only decides the order of the queries.
+    (U is not tightened between targets in the sequential case either.)
+    :param graph_store: Directory of a memory-mapped graph store of G (i.e., CompactGraph.write_mmap()), which the workers
+    open instead of receiving a copy of the graph
+    :return Target t; Recommended path p and its value (cost) v_p
+    """
+
+    start = time.time()
+
+    session = ElicitationSession(G, S, T, d, cache, inner, inner_options, hierarchies, workers, graph_store)
+
+    # User ranking: Compare paths in P
+    user_preference = utils_user.UserPreference(num_objectives=2, std_noise=0.1, seed=123)  # seed=123
+    add_noise = True
+    p_star_utility = None
+
+    with session:
+        query = session.next_query()
+        while query is not None:
+            ranking = user_preference.get_preference(query['values'], add_noise=add_noise)  # This is the ground-truth utility, i.e., the true utility
+            p_star_utility = np.max(ranking)
+            if len(session.P) > 2:
+                print(f"Utility for p*: {p_star_utility}")
+
+            session.submit_answer(int(np.argmax(ranking)))
+            query = session.next_query()
+
+    if p_star_utility is None:  # Nothing was asked
+        p_star_utility = np.max(user_preference.get_preference(session.val_p, add_noise=add_noise))
 
     end = time.time()
     elapsed_seconds = (end - start)
     print("Outer-loop time elapsed in seconds: " + str(elapsed_seconds))
 
-    return t, p_star, val_vector_p_star, p_star_utility, P, val_p
-
+    return session.t, session.p_star, session.val_vector_p_star, p_star_utility, session.P, session.val_p
@@ -0,0 +1,177 @@
+"""
+Pareto front for two objectives (e.g., length and crossing), both minimized.
+A set of mutually non-dominated vectors in 2D is a list sorted by the first objective in increasing order,
+in which the second objective is strictly decreasing. Keeping that order, checking a candidate only needs a
+binary search, i.e., O(log n) comparisons instead of comparing all pairs. Inserting a non-dominated point then
+splices it into the lists, which moves O(n) elements (a memmove, no comparisons).
+For any other number of objectives, ParetoFrontND offers the same dominates/insert interface with linear scans.
+"""
+
+from bisect import bisect_left, bisect_right
+
+
+class ParetoFront2D:
+    """
+    Pareto front of 2D cost vectors, stored as two parallel lists xs (increasing) and ys (strictly decreasing)
+    """
+
+    __slots__ = ('xs', 'ys')
+
+    def __init__(self, points=()):
+        """
+        :param points: Cost vectors to insert, dominated ones are pruned
+        """
+        self.xs = []
+        self.ys = []
+        for point in points:
+            self.insert(point)
+
+    def dominates(self, point):
+        """
+        Check if a vector in the front weakly dominates (i.e., is at least as good as) the point
+        :param point: Cost vector (x, y)
+        :return: Whether the point is weakly dominated by the front
+        """
+        i = bisect_right(self.xs, point[0])  # xs[:i] are the vectors with x <= point[0]
+        return i > 0 and self.ys[i - 1] <= point[1]  # The one with the lowest y among them
+
+    def insert(self, point):
+        """
+        Adds a point to the front and removes the vectors it dominates:
+        O(log n) search for the position, plus O(n) to splice the lists
+        :param point: Cost vector (x, y)
+        :return: Whether the point was added, i.e., whether it was not weakly dominated by the front
+        """
+        x, y = point
+        if self.dominates(point):
+            return False
+
+        # The vectors dominated by the point have x >= point[0] and y >= point[1], they form a contiguous block
+        start = bisect_left(self.xs, x)
+        end = start
+        while end < len(self.ys) and self.ys[end] >= y:
+            end += 1
+
+        self.xs[start:end] = [x]
+        self.ys[start:end] = [y]
+        return True
+
+    def merge(self, other):
+        """
+        Adds all vectors of another front to this one, in a single linear pass over both:
+        both fronts are already sorted by x, so they are merged with two pointers in O(n + m)
+        :param other: ParetoFront2D
+        :return: Whether this front changed
+        """
+        if not other.xs:
+            return False
+
+        xs, ys = [], []
+        i, j = 0, 0
+        n, m = len(self.xs), len(other.xs)
+        while i < n or j < m:
+            # Take the next vector in (x, y) order from either front
+            if j == m or (i < n and (self.xs[i], self.ys[i]) <= (other.xs[j], other.ys[j])):
+                x, y = self.xs[i], self.ys[i]
+                i += 1
+            else:
+                x, y = other.xs[j], other.ys[j]
+                j += 1
+
+            if not ys or y < ys[-1]:  # Sorted by x (and y on ties), so only a lower y is non-dominated
+                xs.append(x)
+                ys.append(y)
+
+        changed = xs != self.xs or ys != self.ys
+        self.xs, self.ys = xs, ys
+        return changed
+
+    def translate(self, cost):
+        """
+        Adds a cost vector to every vector in the front; the order is kept
+        :param cost: Cost vector (x, y)
+        :return: New ParetoFront2D
+        """
+        front = ParetoFront2D()
+        front.xs = [x + cost[0] for x in self.xs]
+        front.ys = [y + cost[1] for y in self.ys]
+        return front
+
+    def copy(self):
+        front = ParetoFront2D()
+        front.xs = list(self.xs)
+        front.ys = list(self.ys)
+        return front
+
+    def __eq__(self, other):
+        if not isinstance(other, ParetoFront2D):
+            return NotImplemented
+        return self.xs == other.xs and self.ys == other.ys
+
+    def __len__(self):
+        return len(self.xs)
+
+    def __iter__(self):
+        return zip(self.xs, self.ys)
+
+    def __contains__(self, point):
+        i = bisect_left(self.xs, point[0])
+        return i < len(self.xs) and self.xs[i] == point[0] and self.ys[i] == point[1]
+
+    def __repr__(self):
+        return f"ParetoFront2D({list(self)})"
+
+
+class ParetoFrontND:
+    """
+    Pareto front of cost vectors with any number of objectives, for when there are not exactly two.
+    Same interface as ParetoFront2D for dominates and insert, with linear scans.
+    """
+
+    __slots__ = ('points',)
+
+    def __init__(self, points=()):
+        """
+        :param points: Cost vectors to insert, dominated ones are pruned
+        """
+        self.points = []
+        for point in points:
+            self.insert(point)
+
+    def dominates(self, point):
+        """
+        Check if a vector in the front weakly dominates (i.e., is at least as good as) the point
+        :param point: Cost vector
+        :return: Whether the point is weakly dominated by the front
+        """
+        return any(all(a <= b for a, b in zip(other, point)) for other in self.points)
+
+    def insert(self, point):
+        """
+        Adds a point to the front and removes the vectors it dominates
+        :param point: Cost vector
+        :return: Whether the point was added, i.e., whether it was not weakly dominated by the front
+        """
+        point = tuple(point)
+        if self.dominates(point):
+            return False
+
+        self.points = [other for other in self.points if not all(a <= b for a, b in zip(point, other))]
+        self.points.append(point)
+        return True
+
+    def __len__(self):
+        return len(self.points)
+
+    def __iter__(self):
+        return iter(self.points)
+
+
+def make_front(num_objectives):
+    """
+    :param num_objectives: Number of objectives
+    :return: Empty ParetoFront2D for two objectives, else an empty ParetoFrontND
+    """
+    if num_objectives == 2:
+        return ParetoFront2D()
+    return ParetoFrontND()
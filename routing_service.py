@@ -0,0 +1,454 @@
+"""
+Routing service: A long-running process that serves route requests of many users at once.
+The graph, the spatial index, the landmark lower bounds (i.e., landmarks.py) and the contraction hierarchies
+(i.e., contraction_hierarchy.py) are loaded once; each route request is a session of the outer loop (i.e., outer_loop.py),
+run in a pool of worker processes, and its state is kept in memory until the session is closed.
+
+Requests are JSON objects, one per line on stdin (responses are written to stdout, one per line),
+or POSTed to a local HTTP server with --http:
+    {"op": "route", "session": "a", "origin": [x, y], "destination": [x, y], "inner": "dfs"}
+    {"op": "status", "session": "a"}
+    {"op": "close", "session": "a"}
+    {"op": "stats"}
+A route request runs the whole session with a simulated user. A real user starts an interactive session instead,
+and answers its queries (the index of the preferred path) one at a time; between answers, only the serialized state of
+the session (i.e., outer_loop.ElicitationSession.serialize()) is kept:
+    {"op": "start", "session": "b", "origin": [x, y], "destination": [x, y], "inner": "dfs"}
+    {"op": "answer", "session": "b", "preferred": 0}
+On stdin, route, start and answer requests are acknowledged at once and answered again when their work is done.
+A session id can only be used again once the session is closed. Over HTTP, a bad request is answered with status 400
+and a session that failed in a worker with status 500.
+
+Usage:
+    python routing_service.py Sidewalk_width_crossings.geojson [--workers 4] [--mmap] [--http 8080]
+"""
+
+import argparse
+import contextlib
+import inspect
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import compact_graph
+import contraction_hierarchy
+import graph_cache
+import landmarks
+import outer_loop
+import spatial_index
+
+_worker = {}  # Graph and bound indexes of a worker process
+
+
+def _init_worker(graph, graph_store, objectives, bounds, hierarchy_dir):
+    """
+    Initialises a worker process of the service
+    :param graph: CompactGraph, or None to open the memory-mapped graph store instead
+    :param graph_store: Directory of a graph store written by CompactGraph.write_mmap(), shared by all workers
+    :param objectives: Objectives
+    :param bounds: Landmarks of the graph, used as lower bounds for every T
+    :param hierarchy_dir: Directory the contraction hierarchies were written to
+    """
+    graph = compact_graph.CompactGraph.open_mmap(graph_store) if graph is None else graph
+    _worker['graph'] = graph
+    _worker['objectives'] = objectives
+    _worker['bounds'] = bounds
+    _worker['hierarchies'] = contraction_hierarchy.build_hierarchies(graph, objectives, hierarchy_dir)
+
+
+def _route(S, T, options):
+    """
+    Runs the outer loop of one session in a worker process
+    :param S: Starting node
+    :param T: Terminating (ending) node
+    :param options: Keyword arguments for outer_loop.outer (e.g., inner, inner_options)
+    :return: Dictionary with the recommended path, its cost and utility, the paths found, and the time spent
+    """
+    start, cpu_start = time.time(), time.process_time()
+
+    with contextlib.redirect_stdout(io.StringIO()):  # outer() reports its progress on stdout, which carries the responses
+        t, p_star, val_vector_p_star, p_star_utility, P, val_p = outer_loop.outer(
+            _worker['graph'], S, T, _worker['objectives'], cache=_worker['bounds'],
+            hierarchies=_worker['hierarchies'], **options)
+
+    return {'path': [list(n) for n in p_star], 'cost': val_vector_p_star[-1].tolist(), 'utility': float(p_star_utility),
+            'target': t.tolist(), 'paths': [[list(n) for n in p] for p in P],
+            'seconds': time.time() - start, 'cpu_seconds': time.process_time() - cpu_start}
+
+
+def _elicit(state, S, T, options, preferred):
+    """
+    Advances an interactive session in a worker process: restores it, submits the answer and runs it to its next query
+    :param state: Serialized session, or None to start a new one
+    :param S: Starting node
+    :param T: Terminating (ending) node
+    :param options: Keyword arguments for outer_loop.ElicitationSession (e.g., inner, inner_options)
+    :param preferred: Answer to the previous query, None for a new session
+    :return: Serialized session; Dictionary with the next query, or with the recommended path if the session is done,
+    and the time spent
+    """
+    start, cpu_start = time.time(), time.process_time()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if state is None:
+            session = outer_loop.ElicitationSession(_worker['graph'], S, T, _worker['objectives'],
+                                                    cache=_worker['bounds'], hierarchies=_worker['hierarchies'],
+                                                    **options)
+        else:
+            session = outer_loop.ElicitationSession.restore(state, _worker['graph'], cache=_worker['bounds'],
+                                                            inner_options=options.get('inner_options'))
+            session.submit_answer(preferred)
+        query = session.next_query()
+
+    if query is None:
+        result = {'status': 'done', 'path': [list(n) for n in session.p_star],
+                  'cost': session.val_vector_p_star[-1].tolist(), 'paths': [[list(n) for n in p] for p in session.P]}
+    else:
+        result = {'status': 'waiting', 'query': {'paths': [[list(n) for n in p] for p in query['paths']],
+                                                 'costs': [v.tolist() for v in query['values']]}}
+
+    return session.serialize(), {**result, 'seconds': time.time() - start, 'cpu_seconds': time.process_time() - cpu_start}
+
+
+def _options(request):
+    """
+    :param request: Route or start request
+    :return: Keyword arguments for the outer loop from the request
+    """
+    options = {key: request[key] for key in ('inner', 'inner_options') if key in request}
+    inner = options.get('inner', 'dfs')
+    if inner not in outer_loop.INNER_LOOPS:
+        raise ValueError(f"Unknown inner loop {inner!r}")
+
+    # Unknown keys would only fail in the worker, as a TypeError of the inner loop
+    inner_options = options.get('inner_options', {})
+    if not isinstance(inner_options, dict):
+        raise ValueError("inner_options has to be an object")
+    unknown = set(inner_options) - _inner_option_names(inner)
+    if unknown:
+        raise ValueError(f"Unknown inner_options {sorted(unknown)} for the inner loop {inner!r}")
+    return options
+
+
+def _inner_option_names(inner):
+    """
+    :param inner: Inner-loop engine, one of outer_loop.INNER_LOOPS
+    :return: Names of the keyword arguments of the inner loop that a request can set; the others are set by the outer
+    loop, and on_improve takes a callback, which can't be sent in a request
+    """
+    parameters = inspect.signature(outer_loop.INNER_LOOPS[inner]).parameters
+    return set(parameters) - {'G', 'S', 'T', 't', 'U', 'max_iter', 'objectives', 'cache', 'on_improve'}
+
+
+class RoutingService:
+    """
+    Sessions of the outer loop, multiplexed over a pool of worker processes that share the read-only graph
+    """
+
+    def __init__(self, graph, objectives=('length', 'crossing'), workers=None, graph_store=None, num_landmarks=16,
+                 hierarchy_dir='graph_cache'):
+        """
+        :param graph: CompactGraph of the map
+        :param objectives: Objectives
+        :param workers: Number of worker processes. By default (i.e., workers=None), one per core
+        :param graph_store: Directory of the memory-mapped graph store of graph, opened by the workers instead of
+        receiving a copy of the graph
+        :param num_landmarks: Number of landmarks for the lower bounds
+        :param hierarchy_dir: Directory for the contraction hierarchies, built once and loaded by every worker
+        """
+        self.graph = graph
+        self.objectives = tuple(objectives)
+        self.workers = workers or os.cpu_count()
+
+        self.index = spatial_index.SpatialIndex(graph)
+        self.bounds = landmarks.Landmarks(graph, self.objectives, num_landmarks, seed=0)
+        contraction_hierarchy.build_hierarchies(graph, self.objectives, hierarchy_dir)
+
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        initargs=(graph if graph_store is None else None, graph_store, self.objectives,
+                                                  self.bounds, hierarchy_dir))
+
+        self.sessions = {}
+        self.states = {}  # Serialized state of the interactive sessions, between answers
+        self.lock = threading.Lock()
+        self.start = time.time()
+        self.completed = 0  # Sessions that are done, run with a simulated user or answered interactively
+        self.steps = 0  # Runs of interactive sessions up to their next query, i.e., start and answer requests
+        self.cpu_seconds = 0.0  # In the workers, for both
+
+    def handle(self, request):
+        """
+        :param request: Dictionary with an "op" and its arguments
+        :return: Response dictionary, or for a route request a Future of the response when the session is done
+        """
+        op = request.get('op')
+        if op == 'route':
+            return self.route(request)
+        if op == 'start':
+            return self.start_session(request)
+        if op == 'answer':
+            return self.answer(request['session'], request['preferred'])
+        if op == 'status':
+            return self.status(request['session'])
+        if op == 'close':
+            with self.lock:
+                self.sessions.pop(request['session'], None)
+                self.states.pop(request['session'], None)
+            return {'session': request['session'], 'status': 'closed'}
+        if op == 'stats':
+            return self.stats()
+        return {'error': f"Unknown op {op!r}"}
+
+    def route(self, request):
+        """
+        Starts a session: snaps the origin and destination to the graph and runs the outer loop in a worker
+        :param request: {"session", "origin", "destination"} and optionally "inner" and "inner_options"
+        :return: Future of the response, or an error response if the session id is in use
+        """
+        session = request['session']
+        S, T = self.index.snap_nodes([request['origin'], request['destination']])
+        options = _options(request)
+
+        if not self._open(session, {'status': 'running', 'S': list(S), 'T': list(T)}):
+            return {'session': session, 'error': "Session id is in use, close it first"}
+
+        response = Future()
+        future = self.pool.submit(_route, S, T, options)
+        future.add_done_callback(lambda f: response.set_result(self._finish(session, f)))
+        return response
+
+    def _open(self, session, info):
+        """
+        Registers a new session, unless a session with the same id exists (e.g., running, waiting or not closed yet)
+        :return: Whether the session was registered
+        """
+        with self.lock:
+            if session in self.sessions:
+                return False
+            self.sessions[session] = info
+            return True
+
+    def start_session(self, request):
+        """
+        Starts an interactive session: snaps the origin and destination to the graph and runs it to its first query
+        :param request: {"session", "origin", "destination"} and optionally "inner" and "inner_options"
+        :return: Future of the response with the query, or an error response if the session id is in use
+        """
+        session = request['session']
+        S, T = self.index.snap_nodes([request['origin'], request['destination']])
+        options = _options(request)
+
+        if not self._open(session, {'status': 'running', 'S': list(S), 'T': list(T), 'options': options}):
+            return {'session': session, 'error': "Session id is in use, close it first"}
+
+        return self._step(session, None, S, T, options, None)
+
+    def answer(self, session, preferred):
+        """
+        Submits the answer to the query of an interactive session and runs it to its next query
+        :param session: Session id
+        :param preferred: Index of the preferred path of the query, 0 or 1
+        :return: Future of the response with the next query or, if the session is done, the recommended path
+        """
+        with self.lock:
+            if session not in self.states or self.sessions[session]['status'] != 'waiting':
+                return {'session': session, 'error': "No query of this session is waiting for an answer"}
+            if preferred not in (0, 1):
+                return {'session': session, 'error': "The answer has to be 0 or 1"}
+            info = self.sessions[session]
+            info['status'] = 'running'
+            state = self.states.pop(session)
+
+        return self._step(session, state, tuple(info['S']), tuple(info['T']), info['options'], preferred)
+
+    def _step(self, session, state, S, T, options, preferred):
+        """
+        Runs _elicit in a worker and keeps the serialized state of the session until the next answer
+        :return: Future of the response
+        """
+        response = Future()
+
+        def finish(future):
+            try:
+                new_state, result = future.result()
+            except Exception as e:
+                new_state, result = None, {'status': 'error', 'error': repr(e)}
+
+            with self.lock:
+                if 'cpu_seconds' in result:
+                    self.steps += 1
+                    self.completed += result['status'] == 'done'
+                    self.cpu_seconds += result['cpu_seconds']
+                if session in self.sessions:  # Not closed in the meantime
+                    self.sessions[session]['status'] = result['status']
+                    if result['status'] == 'waiting':
+                        self.states[session] = new_state
+            response.set_result({'session': session, **result})
+
+        self.pool.submit(_elicit, state, S, T, options, preferred).add_done_callback(finish)
+        return response
+
+    def _finish(self, session, future):
+        """
+        Stores the result of a session
+        :return: Response
+        """
+        try:
+            result = future.result()
+            state = {'status': 'done', **result}
+        except Exception as e:
+            result = None
+            state = {'status': 'error', 'error': repr(e)}
+
+        with self.lock:
+            if result is not None:
+                self.completed += 1
+                self.cpu_seconds += result['cpu_seconds']
+            if session in self.sessions:
+                self.sessions[session].update(state)
+                state = self.sessions[session]
+
+        return {'session': session, **state}
+
+    def status(self, session):
+        with self.lock:
+            if session not in self.sessions:
+                return {'session': session, 'error': "Unknown session"}
+            return {'session': session, **{key: value for key, value in self.sessions[session].items() if key != 'options'}}
+
+    def stats(self):
+        """
+        :return: Number of sessions, and the throughput in total and per core (worker process).
+        A route is a session that is done, including the interactive ones, whose start and answer requests are counted
+        as steps; the CPU time of a route includes all steps of its session
+        """
+        elapsed = time.time() - self.start
+        with self.lock:
+            completed, steps, cpu_seconds = self.completed, self.steps, self.cpu_seconds
+            open_sessions = len(self.sessions)
+
+        return {'workers': self.workers, 'sessions': open_sessions, 'completed': completed, 'steps': steps,
+                'seconds': elapsed, 'cpu_seconds': cpu_seconds,
+                'routes_per_second': completed / elapsed,
+                'routes_per_second_per_core': completed / elapsed / self.workers,
+                'steps_per_second': steps / elapsed,
+                'cpu_seconds_per_route': cpu_seconds / completed if completed else None}
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+
+def serve_stdin(service, stdin=sys.stdin, stdout=sys.stdout):
+    """
+    Answers the requests on stdin, one JSON object per line, until stdin is closed
+    :param service: RoutingService
+    """
+    write_lock = threading.Lock()
+
+    def write(response):
+        with write_lock:
+            stdout.write(json.dumps(response) + '\n')
+            stdout.flush()
+
+    pending = []
+    for line in stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+            response = service.handle(request)
+        except (ValueError, KeyError) as e:
+            write({'error': repr(e)})
+            continue
+
+        if isinstance(response, Future):
+            write({'session': request['session'], 'status': 'running'})
+            response.add_done_callback(lambda f: write(f.result()))
+            pending.append(response)
+        else:
+            write(response)
+
+    for response in pending:  # Answer the sessions that are still running before exiting
+        response.result()
+
+
+def make_http_server(service, port):
+    """
+    HTTP server that answers requests POSTed as JSON to http://localhost:port/;
+    a route, start or answer request is answered when its work is done
+    :param service: RoutingService
+    :param port: Port, 0 for any free port (i.e., server.server_address[1])
+    :return: ThreadingHTTPServer, not serving yet
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            try:
+                request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                response = service.handle(request)
+                if isinstance(response, Future):
+                    response = response.result()
+                if response.get('status') == 'error':
+                    code = 500  # The session failed in the worker
+                else:
+                    code = 400 if 'error' in response else 200
+            except (ValueError, KeyError) as e:
+                response, code = {'error': repr(e)}, 400
+            except Exception as e:
+                response, code = {'error': repr(e)}, 500
+
+            body = json.dumps(response).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer(('localhost', port), Handler)
+
+
+def serve_http(service, port):
+    """
+    Answers requests POSTed as JSON to http://localhost:port/ until interrupted
+    :param service: RoutingService
+    :param port: Port
+    """
+    server = make_http_server(service, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve route requests of many users with the outer loop.")
+    parser.add_argument('geojson', help="GeoJSON map")
+    parser.add_argument('--cache-dir', default='graph_cache', help="Directory of the cache files")
+    parser.add_argument('--objectives', nargs='+', default=['length', 'crossing'], help="Objectives")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes (default: one per core)")
+    parser.add_argument('--mmap', action='store_true', help="Share a memory-mapped graph store between the workers")
+    parser.add_argument('--http', type=int, default=None, metavar='PORT', help="Serve HTTP on this port instead of stdin")
+    args = parser.parse_args()
+
+    objectives = tuple(args.objectives)
+    graph = graph_cache.load_graph(args.geojson, args.cache_dir, objectives, mmap=args.mmap)
+    graph_store = graph_cache.cache_path(args.geojson, args.cache_dir, objectives, mmap=True) if args.mmap else None
+    service = RoutingService(graph, objectives, args.workers, graph_store, hierarchy_dir=args.cache_dir)
+
+    if args.http is None:
+        serve_stdin(service)
+    else:
+        serve_http(service, args.http)
+
+    service.shutdown()
+    print(json.dumps(service.stats()), file=sys.stderr)  # Throughput, in total and per core
@@ -1,59 +1,114 @@
 """
 Single-objective value iteration: v_n \gets {\arg\min}_{n' \in N_G(n)} c(n,n')+v_{n'}
+
+The fixed point of the update above is the shortest-path distance from every node to T,
+so instead of sweeping over all edges until convergence (Bellman-Ford),
+we compute it with a single-source Dijkstra search rooted at T in O(E log V).
 """
 
+import heapq
 import numpy as np
 
+import compact_graph
+
 
 def single_value_iter(G, T, objective):
 
     """
     Calculates the value vector for each node
-    :param G: Single-objective graph G = (V, E)
+    :param G: Single-objective graph G = (V, E), either a networkx graph or a CompactGraph
     :param T: Terminating (ending) node
     :param objective: Objective
-    :return: Optimal value vector for each node
+    :return: Optimal value vector for each node; Successor of each node on its optimal path to T
     """
 
-    v_n = {}  # Value vector
-    next_node = {}
-    edge_cost = []
+    graph = compact_graph.as_compact(G, (objective,))
+
+    # Search backwards from T: the arcs of the reversed graph lead to the nodes that can move to a node
+    reverse = graph.reverse()
+    indptr = reverse.indptr.tolist()
+    indices = reverse.indices.tolist()
+    costs = reverse.costs[:, graph.objective_columns((objective,))[0]].tolist()
 
-    for n in G:
-        v_n[n] = np.inf  # Initialisation of nodes
+    v_n = [np.inf] * len(graph)  # Value vector, initialisation of nodes
+    next_node = [-1] * len(graph)
+    settled = [False] * len(graph)
 
-        if n == T:  # We've reached the terminal state
-            v_n[n] = 0
+    t_index = graph.index(T)
+    v_n[t_index] = 0  # We've reached the terminal state
+    heap = [(0, t_index)]
 
+    while heap:
+        value, n2 = heapq.heappop(heap)
 
-    converged = False
-    while not converged:
-        converged = True
+        if settled[n2]:  # Stale heap entry
+            continue
+        settled[n2] = True
 
-        for e in G.edges(data=True):
-            n1, n2 = e[0], e[1]  # The nodes
+        for e in range(indptr[n2], indptr[n2 + 1]):
+            n1 = indices[e]
+            if settled[n1]:
+                continue
 
             # {\arg\min}_{n' \in N_G(n)} c(n,n')+v_{n'}
-            cost = e[2][objective]
-            edge_cost.append(cost)
+            result = value + costs[e]
+
+            if result < v_n[n1]:
+                v_n[n1] = result
+                next_node[n1] = n2
+                heapq.heappush(heap, (result, n1))
+
+    nodes = graph.nodes
+    return ({nodes[i]: v_n[i] for i in range(len(nodes))},
+            {nodes[i]: nodes[next_node[i]] for i in range(len(nodes)) if next_node[i] >= 0})
+
+
+def multi_objective_lower_bounds(G, T, objectives):
+    """
+    Calculates the single-objective optimal values for every objective at once.
+    All objectives share one reversed adjacency index and one heap,
+    whose entries are (value, objective index, node index).
+    :param G: Multi-objective search graph G = (V, E), either a networkx graph or a CompactGraph
+    :param T: Terminating (ending) node
+    :param objectives: Objectives
+    :return: Array of shape (number of nodes, number of objectives) with the lower bound of each node,
+    rows follow the order of G.nodes
+    """
+
+    graph = compact_graph.as_compact(G, objectives)
+    num_nodes = len(graph)
+    num_objectives = len(objectives)
+
+    # Reversed adjacency index: for each node, the arcs to the nodes that can move to it with their cost vectors
+    reverse = graph.reverse()
+    indptr = reverse.indptr.tolist()
+    indices = reverse.indices.tolist()
+    costs = reverse.costs[:, graph.objective_columns(objectives)].tolist()
 
-            result1 = min(cost + v_n[n2], v_n[n1])
-            result2 = min(cost + v_n[n1], v_n[n2])
+    # Flat bookkeeping shared by all objectives: entry n * num_objectives + k belongs to node n and objective k
+    v_n = [np.inf] * (num_nodes * num_objectives)  # Value vectors
+    settled = [False] * (num_nodes * num_objectives)
 
-            if v_n[n1] != result1 or v_n[n2] != result2:
-                converged = False
+    t_index = graph.index(T)
+    heap = []
+    for k in range(num_objectives):
+        v_n[t_index * num_objectives + k] = 0  # We've reached the terminal state
+        heap.append((0, k, t_index))
 
-                # Next nodes
-                if v_n[n1] != result1:
-                    next_node[n1] = n2
+    while heap:
+        value, k, n2 = heapq.heappop(heap)
 
-                if v_n[n2] != result2:
-                    next_node[n2] = n1
+        if settled[n2 * num_objectives + k]:  # Stale heap entry
+            continue
+        settled[n2 * num_objectives + k] = True
 
-                v_n[n1] = result1
-                v_n[n2] = result2
+        for e in range(indptr[n2], indptr[n2 + 1]):
+            n1 = indices[e]
+            result = value + costs[e][k]
+            entry = n1 * num_objectives + k
 
-        if converged:  # Check for convergence
-            break
+            if result < v_n[entry]:
+                v_n[entry] = result
+                heapq.heappush(heap, (result, k, n1))
 
-    return v_n
+    return np.array(v_n, dtype=float).reshape((num_nodes, num_objectives))
@@ -0,0 +1,49 @@
+"""
+Spatial index: Snaps arbitrary coordinates (e.g., the origin and destination of a request) to the nearest graph node.
+The node coordinates are stored in a KD-tree, so that a query takes O(log V) instead of scanning all nodes,
+and a batch of points is snapped in a single call.
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+import compact_graph
+
+
+class SpatialIndex:
+    """
+    KD-tree over the node coordinates of a graph whose node labels are coordinate tuples
+    """
+
+    def __init__(self, G, objectives=('length', 'crossing')):
+        """
+        :param G: Multi-objective search graph G = (V, E), either a networkx graph or a CompactGraph
+        :param objectives: Objectives, only used to convert a networkx graph
+        """
+        self.graph = compact_graph.as_compact(G, objectives)
+        self.tree = cKDTree(self.graph.coordinates)
+
+    def snap(self, points, max_distance=np.inf, workers=1):
+        """
+        Finds the nearest node of each point
+        :param points: Sequence of n points, or an array of shape (n, number of coordinates)
+        :param max_distance: Points farther than this from every node are not snapped
+        :param workers: Number of threads for large batches; -1 uses all cores
+        :return: Array with the node id of each point (-1 if not snapped); Array with the distance to that node
+        """
+        points = np.asarray(points, dtype=np.float64).reshape((-1, self.tree.m))
+        distances, ids = self.tree.query(points, distance_upper_bound=max_distance, workers=workers)
+
+        ids = np.where(np.isfinite(distances), ids, -1)  # cKDTree returns index n for points without a node in range
+        return ids, distances
+
+    def snap_nodes(self, points, max_distance=np.inf):
+        """
+        Same as snap, with the node labels instead of the node ids
+        :param points: Sequence of n points, or an array of shape (n, number of coordinates)
+        :param max_distance: Points farther than this from every node are not snapped
+        :return: List with the node label of each point (None if not snapped)
+        """
+        ids, _ = self.snap(points, max_distance)
+        nodes = self.graph.nodes
+        return [nodes[i] if i >= 0 else None for i in ids.tolist()]
@@ -0,0 +1,79 @@
+"""
+Small random sidewalk-like graphs, and brute-force Pareto sets to check the searches against
+"""
+
+import itertools
+
+import networkx as nx
+import numpy as np
+
+OBJECTIVES = ('length', 'crossing')
+
+
+def random_multigraph(seed, num_nodes=10, num_edges=18, num_parallel=3):
+    """
+    Connected undirected multigraph with coordinate node labels and integer costs, so that ties are exact
+    :param seed: Seed
+    :param num_nodes: Number of nodes
+    :param num_edges: Number of edges besides the parallel ones, at least num_nodes - 1 for the spanning path
+    :param num_parallel: Number of edges added in parallel to existing ones
+    :return: networkx MultiGraph with 'length' and 'crossing' on every edge
+    """
+    rng = np.random.default_rng(seed)
+    nodes = [(float(x), float(y)) for x, y in rng.integers(0, 1000, (num_nodes, 2))]
+    G = nx.MultiGraph()
+    G.add_nodes_from(nodes)
+
+    def add_edge(u, v):
+        G.add_edge(u, v, length=float(rng.integers(1, 20)), crossing=float(rng.integers(0, 6)))
+
+    order = rng.permutation(num_nodes)
+    for a, b in zip(order[:-1], order[1:]):  # Spanning path, so that the graph is connected
+        add_edge(nodes[a], nodes[b])
+    for _ in range(num_edges - (num_nodes - 1)):
+        a, b = rng.choice(num_nodes, 2, replace=False)
+        add_edge(nodes[a], nodes[b])
+    for _ in range(num_parallel):
+        u, v, _ = list(G.edges(keys=True))[rng.integers(G.number_of_edges())]
+        add_edge(u, v)
+
+    return G
+
+
+def node_path_costs(G, path, objectives=OBJECTIVES):
+    """
+    :param G: networkx MultiGraph
+    :param path: Sequence of node labels
+    :return: Set of the cost vectors of the path, one for each choice of parallel edges
+    """
+    steps = [[tuple(data[i] for i in objectives) for data in G.get_edge_data(u, v).values()]
+             for u, v in zip(path[:-1], path[1:])]
+    return {tuple(map(sum, zip(*choice))) if choice else tuple(0.0 for _ in objectives)
+            for choice in itertools.product(*steps)}
+
+
+def brute_force_pareto_set(G, S, T, objectives=OBJECTIVES):
+    """
+    Pareto-optimal cost vectors of all simple S-T paths, enumerated edge by edge
+    :return: Set of cost vectors (tuples)
+    """
+    costs = set()
+    for edges in nx.all_simple_edge_paths(G, S, T):
+        costs.add(tuple(sum(G.edges[e][i] for e in edges) for i in objectives))
+
+    return {c for c in costs
+            if not any(o != c and all(a <= b for a, b in zip(o, c)) for o in costs)}
+
+
+def target_regions(pareto_set, seed):
+    """
+    :param pareto_set: Pareto set of an S-T pair, e.g., from brute_force_pareto_set
+    :param seed: Seed
+    :return: List of (t, U): target regions between the ideal and the nadir point of the Pareto set,
+    and one around each Pareto-optimal vector
+    """
+    costs = np.array(sorted(pareto_set))
+    ideal, nadir = costs.min(axis=0), costs.max(axis=0)
+    rng = np.random.default_rng(seed)
+    regions = [(ideal, ideal + rng.uniform(0, 1, 2) * (nadir - ideal) + 0.5) for _ in range(5)]
+    return regions + [(ideal, cost) for cost in costs]
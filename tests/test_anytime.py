@@ -0,0 +1,107 @@
+import functools
+import time
+
+import numpy as np
+import pytest
+
+from best_first_lower import best_first_lower
+from dfs_lower import dfs_lower
+from random_graphs import OBJECTIVES, brute_force_pareto_set, node_path_costs, random_multigraph
+
+INNER_LOOPS = [dfs_lower, functools.partial(best_first_lower, anytime=True)]
+
+
+def search_everything(G):
+    """
+    :return: S, T and the target region (t, U) of the whole Pareto set of S-T
+    """
+    S, T = list(G.nodes)[0], list(G.nodes)[-1]
+    return S, T, np.zeros(len(OBJECTIVES)), np.full(len(OBJECTIVES), 1e9)
+
+
+def assert_valid_result(G, S, T, U, path, new_U):
+    """
+    The result of a search cut short: no path and U as it was, or a path in the target region with its cost as U
+    """
+    if not path:
+        assert np.array_equal(new_U, U)
+        return
+    assert path[0] == S and path[-1] == T
+    assert np.all(np.less_equal(new_U, U))
+    assert tuple(new_U) in node_path_costs(G, path)
+
+
+@pytest.mark.parametrize('inner', INNER_LOOPS)
+@pytest.mark.parametrize('seed', range(5))
+def test_zero_budget_stops_with_a_partial_result(inner, seed):
+    G = random_multigraph(seed, num_nodes=30, num_edges=60)
+    S, T, t, U = search_everything(G)
+
+    path, new_U, optimal = inner(G, S, T, t, U, objectives=OBJECTIVES, time_budget=0)
+
+    assert not optimal
+    assert_valid_result(G, S, T, U, path, new_U)
+
+
+@pytest.mark.parametrize('inner', INNER_LOOPS)
+@pytest.mark.parametrize('seed', range(5))
+def test_budget_keeps_the_best_path_found_so_far(inner, seed):
+    G = random_multigraph(seed, num_nodes=30, num_edges=60)
+    S, T, t, U = search_everything(G)
+    improvements = []
+
+    def on_improve(path, cost):
+        improvements.append((path, cost))
+        time.sleep(0.2)  # Uses up the budget, so that the search stops after its first paths
+
+    path, new_U, optimal = inner(G, S, T, t, U, objectives=OBJECTIVES, time_budget=100, on_improve=on_improve)
+
+    assert improvements
+    assert_valid_result(G, S, T, U, path, new_U)
+    assert path == improvements[-1][0]
+    assert np.array_equal(new_U, improvements[-1][1])
+
+
+@pytest.mark.parametrize('inner', INNER_LOOPS)
+@pytest.mark.parametrize('seed', range(20))
+def test_on_improve_reports_improvements_only(inner, seed):
+    G = random_multigraph(seed)
+    S, T, t, U = search_everything(G)
+    pareto_set = brute_force_pareto_set(G, S, T)
+    improvements = []
+
+    path, new_U, optimal = inner(G, S, T, t, U, objectives=OBJECTIVES,
+                                 on_improve=lambda path, cost: improvements.append((path, cost)))
+
+    for path_so_far, cost in improvements:
+        assert_valid_result(G, S, T, U, path_so_far, cost)
+
+    # Each path is better than the one before: no worse in any objective, and not the same cost
+    costs = [tuple(cost) for _, cost in improvements]
+    for before, after in zip(costs[:-1], costs[1:]):
+        assert all(a <= b for a, b in zip(after, before))
+        assert after != before
+
+    assert costs[-1] in pareto_set
+    assert (path, tuple(new_U)) == (improvements[-1][0], costs[-1])
+
+
+@pytest.mark.parametrize('inner', INNER_LOOPS)
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('time_budget', [None, 60000])
+def test_unlimited_budget_finds_the_whole_front(inner, seed, time_budget):
+    G = random_multigraph(seed)
+    S, T = list(G.nodes)[0], list(G.nodes)[-1]
+    pareto_set = brute_force_pareto_set(G, S, T)
+    ideal = np.array(sorted(pareto_set)).min(axis=0)
+
+    # A target region around each Pareto-optimal vector holds no other path, so the search has to find that vector
+    found = set()
+    for cost in sorted(pareto_set):
+        path, new_U, optimal = inner(G, S, T, ideal, np.array(cost), objectives=OBJECTIVES, time_budget=time_budget)
+
+        assert optimal
+        assert tuple(new_U) == cost
+        found.add(tuple(new_U))
+
+    assert found == pareto_set
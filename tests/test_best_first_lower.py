@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from best_first_lower import best_first_lower
+from dfs_lower import dfs_lower
+from random_graphs import OBJECTIVES, brute_force_pareto_set, node_path_costs, random_multigraph, target_regions
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('anytime', [False, True])
+def test_best_first_lower_finds_a_path_in_the_target_region(seed, anytime):
+    G = random_multigraph(seed)
+    S, T = list(G.nodes)[0], list(G.nodes)[-1]
+    pareto_set = brute_force_pareto_set(G, S, T)
+
+    for t, U in target_regions(pareto_set, seed):
+        path, new_U = best_first_lower(G, S, T, t, U, objectives=OBJECTIVES, anytime=anytime)[:2]
+        dfs_path, dfs_U = dfs_lower(G, S, T, t, U, objectives=OBJECTIVES)[:2]
+
+        # Both searches find a path exactly when the region holds one
+        assert (path == []) == (dfs_path == [])
+        if not path:
+            assert not any(np.all(np.less_equal(c, U)) for c in pareto_set)
+            continue
+
+        assert np.all(np.less_equal(new_U, U))
+        assert path[0] == S and path[-1] == T
+        assert tuple(new_U) in node_path_costs(G, path)
+
+        # Run to completion, the path is not dominated by any S-T path, like the one of dfs_lower
+        if anytime:
+            assert tuple(new_U) in pareto_set
+            assert tuple(dfs_U) in pareto_set
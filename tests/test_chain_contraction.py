@@ -0,0 +1,81 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from chain_contraction import contract_chains, expand_path
+from namoa import namoa
+from random_graphs import OBJECTIVES, node_path_costs
+
+
+def chain_graph(seed, num_hubs=5, num_chains=10):
+    """
+    Hub nodes joined by chains of degree-2 nodes: parallel chains between the same hubs, chains in parallel to
+    a direct edge, loops from a hub back to itself and a cycle without any hub
+    :return: networkx MultiGraph; Hub nodes
+    """
+    rng = np.random.default_rng(seed)
+    G = nx.MultiGraph()
+    next_label = iter(range(10 ** 6))
+
+    def new_node():
+        return float(next(next_label)), float(seed)
+
+    def add_chain(nodes):
+        for u, v in zip(nodes[:-1], nodes[1:]):
+            G.add_edge(u, v, length=float(rng.integers(1, 20)), crossing=float(rng.integers(0, 4)))
+
+    hubs = [new_node() for _ in range(num_hubs)]
+    add_chain(hubs)  # Connected through the hubs
+    for _ in range(num_chains):
+        u, w = rng.choice(num_hubs, 2)  # u == w gives a loop
+        add_chain([hubs[u]] + [new_node() for _ in range(rng.integers(0, 4))] + [hubs[w]])
+    add_chain([hubs[0], new_node(), new_node(), hubs[1]])  # Parallel to the direct edge between hubs 0 and 1
+    add_chain([hubs[0], new_node(), new_node(), hubs[1]])  # ... and to the chain above
+
+    cycle = [new_node() for _ in range(4)]
+    add_chain(cycle + [cycle[0]])
+    return G, hubs
+
+
+@pytest.mark.parametrize('seed', range(15))
+def test_contraction_keeps_the_pareto_sets_and_expands_back(seed):
+    G, hubs = chain_graph(seed)
+    simplified, expansion = contract_chains(G, OBJECTIVES, keep=hubs)
+    simplified_nx = simplified.to_networkx()
+    nodes = set(simplified.nodes)
+
+    assert set(hubs) <= nodes
+    assert len(simplified) < G.number_of_nodes()
+
+    for S in hubs:
+        for T in hubs:
+            expected = namoa(G, S, T, OBJECTIVES)
+            found = namoa(simplified, S, T, OBJECTIVES)
+            assert [tuple(cost) for _, cost in found] == [tuple(cost) for _, cost in expected]
+
+            for path, cost in found:
+                expanded = expand_path(path, expansion)
+                assert expanded[0] == S and expanded[-1] == T
+                assert tuple(cost) in node_path_costs(G, expanded)
+
+    # Every merged edge expands into a path of the original graph with the same cost
+    for u, w, data in simplified_nx.edges(data=True):
+        expanded = expand_path([u, w], expansion)
+        assert tuple(data[i] for i in OBJECTIVES) in node_path_costs(G, expanded)
+        assert set(expanded[1:-1]).isdisjoint(nodes)
+
+
+def test_loops_and_cycles_without_a_kept_node_are_dropped():
+    G = nx.MultiGraph()
+    a, b = (0.0, 0.0), (1.0, 0.0)
+    loop = [(2.0, 0.0), (3.0, 0.0)]
+    cycle = [(4.0, 0.0), (5.0, 0.0), (6.0, 0.0)]
+    for u, v in [(a, b), (a, loop[0]), (loop[0], loop[1]), (loop[1], a),
+                 (cycle[0], cycle[1]), (cycle[1], cycle[2]), (cycle[2], cycle[0])]:
+        G.add_edge(u, v, length=1.0, crossing=0.0)
+
+    simplified, expansion = contract_chains(G, OBJECTIVES)
+
+    assert set(simplified.nodes) == {a, b}
+    assert expand_path([a, b], expansion) == [a, b]
+    assert expand_path([], expansion) == []
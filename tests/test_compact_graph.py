@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+import pytest
+
+import compact_graph
+from compact_graph import CompactGraph
+from random_graphs import OBJECTIVES, random_multigraph
+
+
+def assert_same_graph(graph, expected):
+    assert graph.nodes == expected.nodes
+    for name in ('indptr', 'indices', 'costs'):
+        assert np.array_equal(getattr(graph, name), getattr(expected, name))
+    assert (graph.objectives, graph.directed) == (expected.objectives, expected.directed)
+
+
+def test_saved_graph_replaces_the_old_file(tmp_path):
+    path = tmp_path / 'graph.npz'
+    old, new = (CompactGraph.from_networkx(random_multigraph(seed), OBJECTIVES) for seed in (0, 1))
+
+    old.save(path)
+    new.save(path)
+
+    assert_same_graph(CompactGraph.load(path), new)
+    assert os.listdir(tmp_path) == ['graph.npz']  # No temporary file is left behind
+
+
+def test_failed_save_keeps_the_old_file(tmp_path, monkeypatch):
+    path = tmp_path / 'graph.npz'
+    old, new = (CompactGraph.from_networkx(random_multigraph(seed), OBJECTIVES) for seed in (0, 1))
+    old.save(path)
+
+    def fail(f, **arrays):
+        f.write(b'half a file')
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(compact_graph.np, 'savez', fail)
+    with pytest.raises(OSError):
+        new.save(path)
+
+    monkeypatch.undo()
+    assert_same_graph(CompactGraph.load(path), old)
+    assert os.listdir(tmp_path) == ['graph.npz']
+
+
+def test_graph_store_round_trip(tmp_path):
+    graph = CompactGraph.from_networkx(random_multigraph(0), OBJECTIVES)
+    graph.write_mmap(tmp_path / 'store')
+
+    assert_same_graph(CompactGraph.open_mmap(tmp_path / 'store'), graph)
+    assert sorted(os.listdir(tmp_path / 'store')) == ['costs.npy', 'indices.npy', 'indptr.npy', 'meta.json', 'nodes.npy']
@@ -0,0 +1,54 @@
+import itertools
+
+import networkx as nx
+import pytest
+
+from contraction_hierarchy import ContractionHierarchy, build_hierarchies
+from random_graphs import OBJECTIVES, node_path_costs, random_multigraph
+
+
+def lexicographic_best(G, S, T, objective):
+    """
+    :return: Cost vector (in the order of OBJECTIVES) of the simple S-T path that is best in the objective,
+    with ties broken by the other objectives
+    """
+    order = [OBJECTIVES.index(objective)] + [k for k in range(len(OBJECTIVES)) if OBJECTIVES[k] != objective]
+    costs = [tuple(sum(G.edges[e][i] for e in edges) for i in OBJECTIVES) for edges in nx.all_simple_edge_paths(G, S, T)]
+    return min(costs, key=lambda c: tuple(c[k] for k in order))
+
+
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize('objective', OBJECTIVES)
+def test_queries_match_dijkstra(seed, objective):
+    G = random_multigraph(seed)
+    hierarchy = ContractionHierarchy(G, OBJECTIVES, objective)
+
+    for S, T in itertools.product(G.nodes, repeat=2):
+        path, cost = hierarchy.query(S, T)
+
+        assert cost[OBJECTIVES.index(objective)] == nx.dijkstra_path_length(G, S, T, weight=objective)
+        assert tuple(cost) == lexicographic_best(G, S, T, objective)
+        assert path[0] == S and path[-1] == T
+        assert tuple(cost) in node_path_costs(G, path)
+
+
+def test_saved_hierarchies_answer_the_same_queries(tmp_path):
+    G = random_multigraph(0, num_nodes=30, num_edges=50)
+    built = build_hierarchies(G, OBJECTIVES, cache_dir=tmp_path)
+    loaded = build_hierarchies(G, OBJECTIVES, cache_dir=tmp_path)
+
+    for objective in OBJECTIVES:
+        for S, T in itertools.combinations(list(G.nodes)[:10], 2):
+            path, cost = loaded[objective].query(S, T)
+            expected_path, expected_cost = built[objective].query(S, T)
+            assert path == expected_path and list(cost) == list(expected_cost)
+            assert cost[OBJECTIVES.index(objective)] == nx.dijkstra_path_length(G, S, T, weight=objective)
+
+
+def test_no_path_between_components():
+    G = random_multigraph(1)
+    G.add_edge((-1.0, -1.0), (-2.0, -2.0), length=1.0, crossing=0.0)
+    hierarchy = ContractionHierarchy(G, OBJECTIVES)
+
+    with pytest.raises(nx.NetworkXNoPath):
+        hierarchy.query(list(G.nodes)[0], (-1.0, -1.0))
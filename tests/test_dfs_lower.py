@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from dfs_lower import dfs_lower
+from random_graphs import OBJECTIVES, brute_force_pareto_set, node_path_costs, random_multigraph, target_regions
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_dfs_lower_finds_a_pareto_optimal_path_in_the_target_region(seed):
+    G = random_multigraph(seed)
+    S, T = list(G.nodes)[0], list(G.nodes)[-1]
+    pareto_set = brute_force_pareto_set(G, S, T)
+
+    for t, U in target_regions(pareto_set, seed):
+        path, new_U = dfs_lower(G, S, T, t, U, objectives=OBJECTIVES)[:2]
+        inside = [c for c in pareto_set if np.all(np.less_equal(c, U))]
+
+        if not inside:
+            assert path == []
+            continue
+
+        # The path is in the target region and not dominated by any S-T path
+        assert tuple(new_U) in pareto_set
+        assert np.all(np.less_equal(new_U, U))
+        assert path[0] == S and path[-1] == T
+        assert tuple(new_U) in node_path_costs(G, path)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from lmzintgraf_gp_pref_elicit.pymodem.dominance import pareto_indices
+from lmzintgraf_gp_pref_elicit.pymodem.pruners import pareto_prune
+from lmzintgraf_gp_pref_elicit.pymodem.value import ValueVectorSet
+from multi_vi_iter import p_prune
+
+
+def brute_force_indices(vectors, maximise):
+    """
+    O(n^2) Pareto filter: the indices of the vectors that no different vector weakly dominates,
+    and of a group of equal vectors only the first one
+    """
+    sign = -1 if maximise else 1
+    values = [tuple(sign * v for v in vector) for vector in vectors]
+    kept = []
+    for i, v in enumerate(values):
+        if any(w == v for w in values[:i]):
+            continue
+        if any(w != v and all(a <= b for a, b in zip(w, v)) for w in values):
+            continue
+        kept.append(i)
+    return kept
+
+
+def random_vectors(rng, n, k):
+    """
+    Vectors on a small integer grid, so that there are ties and duplicates, with some infinite rows and entries
+    """
+    vectors = rng.integers(0, 5, (n, k)).astype(float)
+    for _ in range(rng.integers(0, 3)):
+        vectors[rng.integers(n), rng.integers(k)] = rng.choice([np.inf, -np.inf])
+    if rng.random() < 0.3:
+        vectors[rng.integers(n)] = rng.choice([np.inf, -np.inf])
+    if n > 1 and rng.random() < 0.5:
+        vectors[rng.integers(n)] = vectors[rng.integers(n)]  # An exact duplicate
+    return vectors
+
+
+@pytest.mark.parametrize('seed', range(100))
+@pytest.mark.parametrize('maximise', [True, False])
+def test_pareto_indices_match_brute_force(seed, maximise):
+    rng = np.random.default_rng(seed)
+    vectors = random_vectors(rng, int(rng.integers(1, 40)), int(rng.integers(1, 5)))
+
+    expected = brute_force_indices(vectors.tolist(), maximise)
+
+    assert pareto_indices(vectors, maximise).tolist() == expected
+    assert pareto_indices(vectors, maximise, block_size=3).tolist() == expected  # Across several blocks
+    assert pareto_indices(vectors.tolist(), maximise).tolist() == expected
+
+
+def test_pareto_indices_of_nothing():
+    assert pareto_indices([], maximise=True).tolist() == []
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_pruners_keep_the_brute_force_front(seed):
+    rng = np.random.default_rng(seed)
+    vectors = [tuple(v) for v in random_vectors(rng, int(rng.integers(1, 30)), 2).tolist()]
+
+    minimal = {vectors[i] for i in brute_force_indices(vectors, maximise=False)}
+    assert p_prune(set(vectors)) == minimal
+
+    vv_set = ValueVectorSet()
+    vv_set.addAll(vectors)
+    assert pareto_prune(vv_set).set == [vectors[i] for i in brute_force_indices(vectors, maximise=True)]
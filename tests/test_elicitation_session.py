@@ -0,0 +1,130 @@
+import io
+import itertools
+
+import networkx as nx
+import numpy as np
+import pytest
+
+import compact_graph
+from outer_loop import ElicitationSession
+from random_graphs import OBJECTIVES, node_path_costs, random_multigraph
+
+
+def simple_graph(seed, num_nodes=30, num_edges=60):
+    """
+    The initial paths are valued by networkx, which takes the cheapest of parallel edges in each objective separately,
+    so the sessions run on graphs without parallel edges (the random extra edges may repeat a pair of nodes)
+    :return: networkx MultiGraph with at most one edge between two nodes
+    """
+    return nx.MultiGraph(nx.Graph(random_multigraph(seed, num_nodes, num_edges, num_parallel=0)))
+
+
+def saved_and_restored(session, graph):
+    """
+    :return: The session after serialize() -> np.savez -> np.load -> restore()
+    """
+    buffer = io.BytesIO()
+    np.savez(buffer, **session.serialize())
+    buffer.seek(0)
+    return ElicitationSession.restore(np.load(buffer), graph)  # np.load refuses pickled (object) arrays
+
+
+def assert_same_query(query, expected):
+    if expected is None:
+        assert query is None
+        return
+    assert query['paths'] == expected['paths']
+    for value, expected_value in zip(query['values'], expected['values']):
+        assert np.array_equal(value, expected_value)
+
+
+def elicit(session, answers):
+    """
+    Answers every query of the session, cycling through answers
+    :return: Number of targets searched in each call of the inner loop(s)
+    """
+    rounds = []
+    search = session._search
+
+    def counted_search():
+        results = search()
+        rounds.append(len(results))
+        return results
+
+    session._search = counted_search
+    answers = itertools.cycle(answers)
+    with session:
+        while session.next_query() is not None:
+            session.submit_answer(next(answers))
+    return rounds
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('answers', [(1, 0), (0, 0), (0, 1)])
+def test_restored_session_asks_the_same_queries(seed, answers):
+    G = simple_graph(seed)
+    graph = compact_graph.as_compact(G, OBJECTIVES)
+    S, T = list(G.nodes)[0], list(G.nodes)[-1]
+
+    session = ElicitationSession(G, S, T, OBJECTIVES)
+    restored = saved_and_restored(session, graph)
+
+    for answer in answers:
+        query = session.next_query()
+        assert_same_query(restored.next_query(), query)
+        if query is None:
+            break
+
+        session.submit_answer(answer)
+        restored.submit_answer(answer)
+        restored = saved_and_restored(restored, graph)
+
+    assert_same_query(restored.next_query(), session.next_query())
+    assert restored.state == session.state
+    assert restored.p_star == session.p_star
+    assert np.array_equal(restored.val_vector_p_star, session.val_vector_p_star)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_val_vector_p_star_follows_p_star(seed):
+    G = simple_graph(seed)
+    S, T = list(G.nodes)[0], list(G.nodes)[-1]
+
+    session = ElicitationSession(G, S, T, OBJECTIVES)
+    elicit(session, (1, 0, 0, 0))
+
+    assert session.done
+    assert tuple(session.val_vector_p_star[-1]) in node_path_costs(G, session.p_star)
+
+
+def test_answers_are_checked():
+    G = simple_graph(0)
+    session = ElicitationSession(G, list(G.nodes)[0], list(G.nodes)[-1], OBJECTIVES)
+
+    with pytest.raises(ValueError):
+        session.submit_answer(2)
+    while session.next_query() is not None:
+        session.submit_answer(0)
+    with pytest.raises(RuntimeError):
+        session.submit_answer(0)
+
+
+@pytest.mark.parametrize('seed', [5, 17, 32, 39])  # Graphs on which new paths lead to new candidate targets
+@pytest.mark.parametrize('answers', [(0,), (1,), (1, 0)])
+def test_parallel_targets_find_the_same_paths(seed, answers):
+    G = simple_graph(seed, num_nodes=60, num_edges=150)
+    S, T = list(G.nodes)[0], list(G.nodes)[-1]
+
+    sequential = ElicitationSession(G, S, T, OBJECTIVES)
+    elicit(sequential, answers)
+    parallel = ElicitationSession(G, S, T, OBJECTIVES, workers=2)
+    rounds = elicit(parallel, answers)
+
+    # Every target is searched against the same U, so the targets and values found don't depend on the order
+    assert parallel.done and sequential.done
+    assert {tuple(c) for c in parallel.C} == {tuple(c) for c in sequential.C}
+    assert {tuple(v) for v in parallel.val_P} == {tuple(v) for v in sequential.val_P}
+    assert len(parallel.val_P) == len(parallel.P) == len({tuple(v) for v in parallel.val_P})
+    for path, val in zip(parallel.P, parallel.val_P):
+        assert tuple(val) in node_path_costs(G, path)
+    assert max(rounds) > 1
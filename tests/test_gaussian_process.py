@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+from scipy.stats import norm
+
+from lmzintgraf_gp_pref_elicit.dataset import DatasetPairwise
+from lmzintgraf_gp_pref_elicit.gaussian_process import GPPairwise
+
+
+def new_gp(seed=0):
+    return GPPairwise(num_objectives=2, std_noise=0.01, kernel_width=0.15, prior_mean_type='zero', seed=seed)
+
+
+def answers(seed, num_answers):
+    """
+    Comparisons as in the outer loop: the first one between two points, every later one between a new point and a
+    point that was compared before, won by the point with the higher (linear) utility
+    :return: Dataset after each answer
+    """
+    rng = np.random.default_rng(seed)
+    weights = rng.uniform(0, 1, 2)
+    dataset = DatasetPairwise(num_objectives=2)
+    points = [rng.uniform(0, 1, 2)]
+
+    for _ in range(num_answers):
+        old, new = points[rng.integers(len(points))], rng.uniform(0, 1, 2)
+        points.append(new)
+        winner, loser = (old, new) if np.dot(weights, old) > np.dot(weights, new) else (new, old)
+        dataset.add_single_comparison(winner, loser)
+        yield dataset
+
+
+def dense_posterior(gp, dataset, f_map):
+    """
+    Reference: the update with explicit inverses that GPPairwise did before it used Cholesky factors
+    :param f_map: Starting point of Newton-Raphson
+    :return: MAP estimate; Function (x_new) -> (predictive mean, predictive covariance)
+    """
+    noise = np.sqrt(2) * gp.std_noise
+    h = np.zeros((dataset.comparisons.shape[0], dataset.datapoints.shape[0]))
+    h[np.arange(h.shape[0]), dataset.comparisons[:, 0]] += 1
+    h[np.arange(h.shape[0]), dataset.comparisons[:, 1]] -= 1
+
+    def hess_likelihood(z):
+        p = np.exp(2. * norm.logpdf(z) - 2. * norm.logcdf(z)) + z * np.exp(norm.logpdf(z) - norm.logcdf(z))
+        return - np.dot(h.T * p, h) / (2 * gp.std_noise ** 2) + np.eye(h.shape[1]) * 0.01
+
+    cov_mat = gp._cov_mat(dataset.datapoints)
+    cov_mat_inv = np.linalg.inv(cov_mat)
+    f_map = np.array(f_map, dtype=float)
+    for _ in range(100):
+        z = np.dot(h, f_map) / noise
+        g = - np.dot(cov_mat_inv, f_map) + np.dot(h.T, np.exp(norm.logpdf(z) - norm.logcdf(z))) / noise
+        update = np.dot(np.linalg.inv(hess_likelihood(z) - cov_mat_inv), g)
+        f_map -= update
+        if np.linalg.norm(update) < 0.0001:
+            break
+
+    pred_cov_factor = np.linalg.inv(cov_mat - np.linalg.inv(hess_likelihood(np.dot(h, f_map) / noise)))
+
+    def predict(x_new):
+        cov_x_xnew = gp._cov_mat(dataset.datapoints, x_new)
+        mean = np.dot(np.dot(cov_x_xnew.T, cov_mat_inv), f_map)
+        return mean, gp._cov_mat(x_new, noise=False) - np.dot(np.dot(cov_x_xnew.T, pred_cov_factor), cov_x_xnew)
+
+    return f_map, predict
+
+
+def prediction_points(seed):
+    return np.random.default_rng(seed + 1000).uniform(0, 1, (20, 2))
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_cholesky_update_matches_the_dense_inverses(seed):
+    for dataset in answers(seed, 8):
+        gp = new_gp(seed)
+        gp.update(dataset)
+        f_init = np.random.RandomState(seed).uniform(0., 1., dataset.datapoints.shape[0])  # gp's first draw
+        f_map, predict = dense_posterior(gp, dataset, f_init)
+
+        assert np.allclose(gp.utility_vals, f_map, rtol=0, atol=1e-10)
+        mean, cov = gp.get_predictive_params(prediction_points(seed), pointwise=False)
+        dense_mean, dense_cov = predict(prediction_points(seed))
+        assert np.allclose(mean, dense_mean, rtol=0, atol=1e-10)
+        assert np.allclose(cov, dense_cov, rtol=0, atol=1e-10)
+        assert np.allclose(gp.get_predictive_params(prediction_points(seed), pointwise=True)[1], np.diag(dense_cov),
+                           rtol=0, atol=1e-10)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_incremental_updates_match_a_full_refit(seed):
+    gp = new_gp()
+
+    for dataset in answers(seed, 8):
+        gp.update(dataset, incremental=True)
+        refit = new_gp()
+        refit.update(dataset)
+
+        # The covariance factor extended by the new rows is the one of the whole covariance matrix
+        assert np.allclose(gp.cov_chol, refit.cov_chol, rtol=0, atol=1e-10)
+
+        # Both Newton-Raphson runs stop once a step is below 1e-4, close to the same (unique) MAP estimate,
+        # so they agree to about 1e-6 in the utilities and 1e-5 in the predictive variance
+        assert np.allclose(gp.utility_vals, refit.utility_vals, rtol=0, atol=1e-5)
+        for pointwise in (True, False):
+            mean, var = gp.get_predictive_params(prediction_points(seed), pointwise)
+            refit_mean, refit_var = refit.get_predictive_params(prediction_points(seed), pointwise)
+            assert np.allclose(mean, refit_mean, rtol=0, atol=1e-5)
+            assert np.allclose(var, refit_var, rtol=0, atol=1e-4)
+
+def test_incremental_update_without_new_datapoints():
+    datasets = answers(0, 3)
+    gp = new_gp()
+    gp.update(next(datasets), incremental=True)  # Nothing to start from: a full update
+    dataset = next(datasets)
+
+    dataset.comparisons = dataset.comparisons[:-1]  # Same datapoints, fewer comparisons than the GP has seen
+    gp.update(dataset, incremental=True)
+    refit = new_gp()
+    refit.update(dataset)
+
+    assert np.allclose(gp.utility_vals, refit.utility_vals, rtol=0, atol=1e-5)
@@ -0,0 +1,49 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from landmarks import Landmarks
+from namoa import namoa
+from random_graphs import OBJECTIVES, brute_force_pareto_set, random_multigraph
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_lower_bounds_are_admissible_and_exact_at_the_landmarks(seed):
+    G = random_multigraph(seed, num_nodes=20, num_edges=35)
+    landmarks = Landmarks(G, OBJECTIVES, num_landmarks=3, seed=seed)
+    nodes = list(landmarks.node_index)
+
+    for T in G.nodes:
+        bounds = landmarks.lower_bounds(T)
+        for k, objective in enumerate(OBJECTIVES):
+            distances = nx.single_source_dijkstra_path_length(G, T, weight=objective)
+            for n in nodes:
+                assert bounds[landmarks.node_index[n], k] <= distances[n] + 1e-9
+            for l in landmarks.landmarks:
+                assert bounds[l, k] == pytest.approx(distances[nodes[l]])
+
+        n = nodes[seed % len(nodes)]
+        assert np.array_equal(landmarks.lower_bound(n, T), bounds[landmarks.node_index[n]])
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_namoa_with_landmarks_finds_the_brute_force_pareto_set(seed):
+    G = random_multigraph(seed)
+    landmarks = Landmarks(G, OBJECTIVES, num_landmarks=2, seed=seed)
+    S, T = list(G.nodes)[0], list(G.nodes)[-1]
+
+    pareto_set = namoa(G, S, T, OBJECTIVES, cache=landmarks)
+
+    assert {tuple(cost) for _, cost in pareto_set} == brute_force_pareto_set(G, S, T)
+
+
+def test_saved_landmarks_give_the_same_bounds(tmp_path):
+    G = random_multigraph(0, num_nodes=20, num_edges=35)
+    landmarks = Landmarks(G, OBJECTIVES, num_landmarks=4, seed=0)
+    landmarks.save(tmp_path / 'landmarks.npz')
+    loaded = Landmarks.load(tmp_path / 'landmarks.npz', G)
+
+    T = list(G.nodes)[3]
+    assert np.array_equal(loaded.lower_bounds(T), landmarks.lower_bounds(T))
+    with pytest.raises(ValueError):
+        Landmarks.load(tmp_path / 'landmarks.npz', random_multigraph(1))
@@ -0,0 +1,93 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+import compact_graph
+import lower_bound_cache
+import single_vi_iter
+from landmarks import Landmarks
+from lower_bound_cache import LowerBoundCache
+from random_graphs import OBJECTIVES, random_multigraph
+
+
+def test_cached_bounds_match_a_fresh_computation():
+    G = random_multigraph(0)
+    cache = LowerBoundCache()
+
+    for T in G.nodes:
+        expected = single_vi_iter.multi_objective_lower_bounds(G, T, OBJECTIVES)
+        assert np.array_equal(cache.get(G, T, OBJECTIVES), expected)
+        assert np.array_equal(cache.get(G, T, OBJECTIVES), expected)  # From memory
+        assert np.array_equal(cache.get(G, T, OBJECTIVES[::-1]), expected[:, ::-1])
+
+
+def test_least_recently_used_entries_are_evicted():
+    G = random_multigraph(0)
+    T1, T2, T3 = list(G.nodes)[:3]
+    fingerprint = lower_bound_cache.graph_fingerprint(G)
+    cache = LowerBoundCache(max_size=4)
+
+    cache.get(G, T1, OBJECTIVES)
+    cache.get(G, T2, OBJECTIVES)
+    cache.get(G, T1, ('length',))  # T1's length bounds become the most recently used entry
+    cache.get(G, T3, OBJECTIVES)
+
+    assert list(cache.entries) == [(fingerprint, T2, 'crossing'), (fingerprint, T1, 'length'),
+                                   (fingerprint, T3, 'length'), (fingerprint, T3, 'crossing')]
+
+
+def test_bounds_are_read_back_from_disk(tmp_path, monkeypatch):
+    G = random_multigraph(0)
+    T = list(G.nodes)[-1]
+    expected = LowerBoundCache(cache_dir=tmp_path).get(G, T, OBJECTIVES)
+    assert len(os.listdir(tmp_path)) == len(OBJECTIVES)  # One .npy file per objective
+
+    def fail(*args):
+        raise AssertionError("The bounds were computed again")
+
+    monkeypatch.setattr(single_vi_iter, 'multi_objective_lower_bounds', fail)
+    cache = LowerBoundCache(max_size=1, cache_dir=tmp_path)
+    assert np.array_equal(cache.get(G, T, OBJECTIVES), expected)  # Evicts one objective to read the other
+    cache.clear()
+    assert np.array_equal(cache.get(G, T, OBJECTIVES), expected)
+
+
+def test_graphs_with_other_costs_do_not_share_entries():
+    G = random_multigraph(0)
+    T = list(G.nodes)[-1]
+    cache = LowerBoundCache()
+    before = cache.get(G, T, OBJECTIVES)
+
+    H = G.copy()
+    for _, _, data in H.edges(data=True):
+        data['length'] += 1
+    assert not np.array_equal(cache.get(H, T, OBJECTIVES), before)
+
+
+def test_numpy_edge_attributes_are_part_of_the_fingerprint():
+    G = random_multigraph(0)
+    H = G.copy()
+    for _, _, data in H.edges(data=True):
+        data['length'], data['crossing'] = np.float64(data['length']), np.float32(data['crossing'])
+    assert lower_bound_cache.graph_fingerprint(H) == lower_bound_cache.graph_fingerprint(G)
+
+    u, v, key = next(iter(H.edges(keys=True)))
+    H[u][v][key]['crossing'] += 1
+    assert lower_bound_cache.graph_fingerprint(H) != lower_bound_cache.graph_fingerprint(G)
+
+
+@pytest.mark.parametrize('make_cache', [lambda G: LowerBoundCache(),
+                                        lambda G: Landmarks(G, OBJECTIVES, num_landmarks=4, seed=0)],
+                         ids=['LowerBoundCache', 'Landmarks'])
+def test_pickled_caches_recompute_their_fingerprints(make_cache):
+    G = compact_graph.as_compact(random_multigraph(0), OBJECTIVES)  # As the inner loops query them
+    T = list(G.nodes)[-1]
+    cache = make_cache(G)
+    expected = cache.get(G, T, OBJECTIVES)  # Remembers the fingerprint of G in a weak dictionary
+
+    copy = pickle.loads(pickle.dumps(cache))  # E.g., sent to a worker process
+
+    assert np.array_equal(copy.get(G, T, OBJECTIVES), expected)
+    assert copy.graph_fingerprint(G) == lower_bound_cache.graph_fingerprint(G)
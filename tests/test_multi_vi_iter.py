@@ -0,0 +1,38 @@
+import pytest
+
+from multi_vi_iter import async_pvi, pvi
+from random_graphs import OBJECTIVES, brute_force_pareto_set, random_multigraph
+
+
+def expected_fronts(G, T):
+    """
+    :return: Brute-force Pareto set towards T for each node, in the order of G.nodes
+    """
+    return [{(0.0, 0.0)} if n == T else brute_force_pareto_set(G, n, T) for n in G.nodes]
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_pvi_finds_the_brute_force_pareto_sets(seed):
+    # The parallel edges of random_multigraph have their own costs, which pvi has to consider besides the first edge
+    G = random_multigraph(seed)
+    T = list(G.nodes)[-1]
+
+    fronts = pvi(G, T, OBJECTIVES)
+
+    assert [set(front) for front in fronts] == expected_fronts(G, T)
+
+
+@pytest.mark.parametrize('seed', range(8))
+@pytest.mark.parametrize('objectives', [OBJECTIVES, ('length',)])
+def test_async_pvi_finds_the_same_sets_as_pvi(seed, objectives):
+    G = random_multigraph(seed)
+    T = list(G.nodes)[seed % len(G.nodes)]
+
+    assert async_pvi(G, T, objectives) == pvi(G, T, objectives)
+
+
+def test_async_pvi_finds_the_brute_force_pareto_sets():
+    G = random_multigraph(0, num_nodes=12, num_edges=24)
+    T = list(G.nodes)[-1]
+
+    assert async_pvi(G, T, OBJECTIVES) == expected_fronts(G, T)
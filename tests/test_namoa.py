@@ -0,0 +1,25 @@
+import pytest
+
+from namoa import namoa
+from random_graphs import OBJECTIVES, brute_force_pareto_set, node_path_costs, random_multigraph
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('heuristic', [True, False])
+def test_namoa_finds_the_brute_force_pareto_set(seed, heuristic):
+    G = random_multigraph(seed)
+    S, T = list(G.nodes)[0], list(G.nodes)[-1]
+
+    pareto_set = namoa(G, S, T, OBJECTIVES, heuristic=heuristic)
+
+    assert {tuple(cost) for _, cost in pareto_set} == brute_force_pareto_set(G, S, T)
+    for path, cost in pareto_set:
+        assert path[0] == S and path[-1] == T
+        assert tuple(cost) in node_path_costs(G, path)
+
+
+def test_namoa_from_T_to_itself():
+    G = random_multigraph(0)
+    T = list(G.nodes)[0]
+
+    assert [tuple(cost) for _, cost in namoa(G, T, T, OBJECTIVES)] == [(0.0, 0.0)]
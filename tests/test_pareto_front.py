@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from pareto_front import ParetoFront2D
+
+INF = float('inf')
+
+
+def brute_force_front(points):
+    """
+    O(n^2) Pareto filter: the distinct points that no other point weakly dominates
+    :return: Set of points
+    """
+    points = set(points)
+    return {p for p in points if not any(q != p and q[0] <= p[0] and q[1] <= p[1] for q in points)}
+
+
+def random_points(rng, n):
+    """
+    Points on a small integer grid, so that there are ties and duplicates, with some infinite coordinates
+    """
+    points = [tuple(float(c) for c in rng.integers(0, 8, 2)) for _ in range(n)]
+    for _ in range(rng.integers(0, 3)):
+        points[rng.integers(n)] = (INF, float(rng.integers(0, 8)))
+    for _ in range(rng.integers(0, 3)):
+        points[rng.integers(n)] = (float(rng.integers(0, 8)), INF)
+    if rng.random() < 0.3:
+        points[rng.integers(n)] = (INF, INF)
+    return points
+
+
+def assert_sorted(front):
+    assert front.xs == sorted(front.xs)
+    assert all(a > b for a, b in zip(front.ys[:-1], front.ys[1:]))
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_insert_keeps_the_brute_force_front(seed):
+    rng = np.random.default_rng(seed)
+    points = random_points(rng, int(rng.integers(1, 30)))
+
+    front = ParetoFront2D()
+    for k, point in enumerate(points):
+        before = set(front)
+        added = front.insert(point)
+
+        assert added == (point not in before and brute_force_front(before | {point}) != before)
+        assert set(front) == brute_force_front(points[:k + 1])
+        assert_sorted(front)
+
+    assert set(ParetoFront2D(points[::-1])) == set(front)  # The order of insertion doesn't matter
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_dominates_and_contains_match_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    points = random_points(rng, int(rng.integers(1, 20)))
+    front = ParetoFront2D(points)
+
+    for query in random_points(rng, 20) + points:
+        weakly_dominated = any(p[0] <= query[0] and p[1] <= query[1] for p in front)
+        assert front.dominates(query) == weakly_dominated
+        assert (query in front) == (query in brute_force_front(points))
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_merge_is_the_front_of_the_union(seed):
+    rng = np.random.default_rng(seed)
+    a, b = random_points(rng, int(rng.integers(1, 20))), random_points(rng, int(rng.integers(1, 20)))
+    front, other = ParetoFront2D(a), ParetoFront2D(b)
+    before = front.copy()
+
+    changed = front.merge(other)
+
+    assert set(front) == brute_force_front(a + b)
+    assert_sorted(front)
+    assert changed == (front != before)
+    assert set(other) == brute_force_front(b)  # Not changed by the merge
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_translate_and_equality(seed):
+    rng = np.random.default_rng(seed)
+    points = random_points(rng, int(rng.integers(1, 20)))
+    front = ParetoFront2D(points)
+    cost = tuple(float(c) for c in rng.integers(0, 5, 2))
+
+    translated = front.translate(cost)
+
+    assert set(translated) == brute_force_front([(x + cost[0], y + cost[1]) for x, y in points])
+    assert translated == ParetoFront2D([(x + cost[0], y + cost[1]) for x, y in points])
+    assert front == ParetoFront2D(points[::-1])
+    assert translated.translate((-cost[0], -cost[1])) == front
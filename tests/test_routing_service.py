@@ -0,0 +1,127 @@
+import io
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import networkx as nx
+import pytest
+
+import compact_graph
+import routing_service
+from random_graphs import OBJECTIVES, random_multigraph
+
+
+@pytest.fixture(scope='module')
+def service(tmp_path_factory):
+    G = nx.MultiGraph(nx.Graph(random_multigraph(17, num_nodes=60, num_edges=150, num_parallel=0)))
+    graph = compact_graph.as_compact(G, OBJECTIVES)
+    service = routing_service.RoutingService(graph, OBJECTIVES, workers=2, num_landmarks=4,
+                                             hierarchy_dir=str(tmp_path_factory.mktemp('hierarchies')))
+    yield service
+    service.shutdown()
+
+
+def route_request(service, op, session, **options):
+    nodes = service.graph.nodes
+    return {'op': op, 'session': session, 'origin': list(nodes[0]), 'destination': list(nodes[-1]), **options}
+
+
+def test_stdin_round_trip(service):
+    requests = [route_request(service, 'route', 'stdin-route', inner='best_first', inner_options={'anytime': True}),
+                route_request(service, 'start', 'stdin-start'),
+                route_request(service, 'route', 'stdin-bad', inner_options={'anytme': True}),
+                route_request(service, 'route', 'stdin-unknown', inner='astar'),
+                {'op': 'answer', 'session': 'stdin-start'},
+                {'op': 'teleport'}]
+    stdout = io.StringIO()
+
+    routing_service.serve_stdin(service, io.StringIO('\n'.join(json.dumps(r) for r in requests) + '\n'), stdout)
+
+    responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    by_session = {}
+    for response in responses:
+        by_session.setdefault(response.get('session'), []).append(response)
+
+    # Acknowledged at once, then answered when the work is done
+    assert [r['status'] for r in by_session['stdin-route']] == ['running', 'done']
+    assert by_session['stdin-route'][1]['path'][0] == list(service.graph.nodes[0])
+    assert by_session['stdin-route'][1]['path'][-1] == list(service.graph.nodes[-1])
+    assert [r['status'] for r in by_session['stdin-start']] == ['running', 'waiting']
+    assert len(by_session['stdin-start'][1]['query']['paths']) == 2
+
+    # The bad requests are answered with an error and open no session
+    errors = [r['error'] for r in responses if 'error' in r]
+    assert len(errors) == 4
+    assert any('anytme' in error for error in errors)
+    assert any('astar' in error for error in errors)
+    assert 'stdin-bad' not in service.sessions and 'stdin-unknown' not in service.sessions
+
+
+@pytest.fixture(scope='module')
+def post(service):
+    server = routing_service.make_http_server(service, 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def post(request):
+        """
+        :return: HTTP status code; Response
+        """
+        http_request = urllib.request.Request(f'http://localhost:{server.server_address[1]}/',
+                                              data=json.dumps(request).encode(), method='POST')
+        try:
+            with urllib.request.urlopen(http_request) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    yield post
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_round_trip(service, post):
+    before = post({'op': 'stats'})[1]
+
+    code, response = post(route_request(service, 'start', 'http'))
+    assert code == 200
+    steps = 1
+    while response['status'] == 'waiting':
+        assert len(response['query']['costs']) == 2
+        code, response = post({'op': 'answer', 'session': 'http', 'preferred': 0})
+        assert code == 200
+        steps += 1
+
+    assert response['status'] == 'done'
+    assert response['path'][0] == list(service.graph.nodes[0])
+    assert len(response['paths']) == steps  # One query of the initial paths, then one per new path, each answered
+    assert post({'op': 'status', 'session': 'http'})[1]['status'] == 'done'
+
+    # The interactive session counts as a route, with the CPU time of all its steps
+    after = post({'op': 'stats'})[1]
+    assert after['completed'] == before['completed'] + 1
+    assert after['steps'] == before['steps'] + steps
+    assert after['cpu_seconds'] > before['cpu_seconds']
+
+    assert post({'op': 'close', 'session': 'http'}) == (200, {'session': 'http', 'status': 'closed'})
+
+
+@pytest.mark.parametrize('request_', [
+    {'op': 'start', 'inner_options': {'max_iter': 10}},  # Set by the outer loop
+    {'op': 'start', 'inner_options': {'time_budget': 50, 'anytime': True}},  # anytime is for best_first only
+    {'op': 'start', 'inner_options': [50]},
+    {'op': 'route', 'inner': 'astar'},
+    {'op': 'answer', 'session': 'nobody', 'preferred': 0},
+    {'op': 'status'},
+    {'op': 'teleport'},
+])
+def test_http_bad_requests(service, post, request_):
+    if 'inner_options' in request_ or 'inner' in request_:
+        request_ = {**route_request(service, request_['op'], 'http-bad'), **request_}
+
+    code, response = post(request_)
+
+    assert code == 400
+    assert 'error' in response
+    assert 'http-bad' not in service.sessions